@@ -0,0 +1,35 @@
+_EXPORTS = {
+    "HclParser": "hcl",
+    "HclTokenType": "hcl",
+    "TomlSerializer": "toml_serializer",
+    "IncrementalTomlSerializer": "toml_serializer",
+    "XMLSerializer": "xml_serializer",
+    "BinSerializer": "binary",
+    "BinTypes": "binary",
+    "BinArchive": "archive",
+    "hcl_to_toml": "stream",
+    "hcl_to_toml_regex": "stream",
+    "iter_hcl_to_toml": "stream",
+    "iter_hcl_to_toml_regex": "stream",
+    "convert_file": "stream",
+    "convert": "dispatch",
+    "Dispatcher": "dispatch",
+    "Backend": "dispatch",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = __import__(f"{__name__}.{module_name}", fromlist=[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,362 @@
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .binary import BinSerializer
+
+
+MAGIC = b"HBAR\x01"
+RECORD_MAGIC = b"HREC"
+TRAILER_MAGIC = b"HIDX"
+
+# magic, name length, payload length, payload crc32
+RECORD_HEADER = struct.Struct(">4sHII")
+# name hash, record offset, record length
+INDEX_ENTRY = struct.Struct(">QQQ")
+# index offset, entries count, magic
+TRAILER = struct.Struct(">QQ4s")
+
+
+def _name_hash(name: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), "big")
+
+
+def _footer(index: List[Tuple[int, int, int]], index_offset: int) -> bytes:
+    footer = b"".join(INDEX_ENTRY.pack(*entry) for entry in index)
+    return footer + TRAILER.pack(index_offset, len(index), TRAILER_MAGIC)
+
+
+def _write_compacted(path: str, source, records: List[Tuple[int, int]]) -> Tuple[int, List[Tuple[int, int, int]]]:
+    # The compacted copy replaces the archive by rename, so readers that
+    # still map the old file keep a valid mapping of it.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    index = []
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(MAGIC)
+            offset = len(MAGIC)
+            for start, length in sorted(records):
+                source.seek(start)
+                record = source.read(length)
+                _, name_length, _, _ = RECORD_HEADER.unpack_from(record)
+                name = record[RECORD_HEADER.size:RECORD_HEADER.size + name_length]
+                out.write(record)
+                index.append((_name_hash(name), offset, length))
+                offset += length
+            index.sort()
+            out.write(_footer(index, offset))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return offset, index
+
+
+def _footer_at(buf, end: int) -> Optional[Tuple[int, int]]:
+    if end < len(MAGIC) + TRAILER.size:
+        return None
+    index_offset, count, magic = TRAILER.unpack_from(buf, end - TRAILER.size)
+    if magic != TRAILER_MAGIC or index_offset < len(MAGIC):
+        return None
+    if index_offset + count * INDEX_ENTRY.size != end - TRAILER.size:
+        return None
+    return index_offset, count
+
+
+def _last_footer(buf, end: int) -> Optional[Tuple[int, int, int]]:
+    # Footers are only ever appended, so a tail that is not a footer is a
+    # record still being written (or torn by a crash); the previous footer
+    # still describes a consistent archive.
+    while True:
+        footer = _footer_at(buf, end)
+        if footer is not None:
+            return footer[0], footer[1], end
+        found = buf.rfind(TRAILER_MAGIC, len(MAGIC), end - 1)
+        if found < 0:
+            return None
+        end = found + len(TRAILER_MAGIC)
+
+
+def _skip_footer(buf, offset: int, size: int) -> Optional[int]:
+    found = buf.find(TRAILER_MAGIC, offset + TRAILER.size - len(TRAILER_MAGIC), size)
+    while found >= 0:
+        end = found + len(TRAILER_MAGIC)
+        footer = _footer_at(buf, end)
+        if footer is not None and footer[0] == offset:
+            return end
+        found = buf.find(TRAILER_MAGIC, end, size)
+    return None
+
+
+class BinArchive:
+    def __init__(self, path: str, mode: str = "r"):
+        if mode not in ("r", "a"):
+            raise ValueError(f"Unsupported mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._index_offset = 0
+        self._count = 0
+        self._footer_end = 0
+        self._live = 0
+        self._dirty = False
+        self._entries: Dict[int, List[Tuple[int, int]]] = {}
+
+        try:
+            if mode == "r":
+                self._open_reader()
+            else:
+                self._open_writer()
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self):
+        if self.mode == "a":
+            return sum(len(entries) for entries in self._entries.values())
+        return self._count
+
+    def __contains__(self, name: str):
+        return self._find(name.encode("utf-8")) is not None
+
+    def _open_reader(self):
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + TRAILER.size:
+            raise ValueError(f"Not an indexed archive: {self.path}")
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not an archive: {self.path}")
+
+        footer = _last_footer(self._map, size)
+        if footer is None:
+            raise ValueError(f"Archive index is missing or damaged, run rebuild_index: {self.path}")
+
+        self._index_offset, self._count, self._footer_end = footer
+
+    def _open_writer(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self._file = open(self.path, "wb+")
+            self._file.write(MAGIC)
+            self._index_offset = len(MAGIC)
+            self._dirty = True
+            return
+
+        try:
+            reader = BinArchive(self.path, "r")
+        except ValueError:
+            reader = None
+        if reader is None or reader._footer_end != len(reader._map):
+            # Records after the last footer were left by a writer that did not
+            # close; index them so the next footer covers them.
+            if reader is not None:
+                reader.close()
+            BinArchive.rebuild_index(self.path)
+            reader = BinArchive(self.path, "r")
+
+        with reader:
+            for i in range(reader._count):
+                name_hash, offset, length = reader._entry(i)
+                self._entries.setdefault(name_hash, []).append((offset, length))
+                self._live += length
+
+        # Records and the next footer go after the current footer, which is
+        # left untouched so open readers keep a valid mapping and index.
+        self._file = open(self.path, "rb+")
+        self._index_offset = self._file.seek(0, os.SEEK_END)
+
+    def _entry(self, i: int) -> Tuple[int, int, int]:
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + i * INDEX_ENTRY.size)
+
+    def _find(self, name: bytes) -> Optional[Tuple[int, int]]:
+        name_hash = _name_hash(name)
+
+        if self.mode == "a":
+            for offset, length in self._entries.get(name_hash, ()):
+                if self._read_name(offset) == name:
+                    return offset, length
+            return None
+
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < name_hash:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        while lo < self._count:
+            entry_hash, offset, length = self._entry(lo)
+            if entry_hash != name_hash:
+                break
+            if self._read_name(offset) == name:
+                return offset, length
+            lo += 1
+        return None
+
+    def _read_name(self, offset: int) -> bytes:
+        if self._map is not None:
+            _, name_length, _, _ = RECORD_HEADER.unpack_from(self._map, offset)
+            start = offset + RECORD_HEADER.size
+            return self._map[start:start + name_length]
+
+        self._file.seek(offset)
+        _, name_length, _, _ = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+        return self._file.read(name_length)
+
+    def get_raw(self, name: str) -> bytes:
+        name_bytes = name.encode("utf-8")
+        found = self._find(name_bytes)
+        if found is None:
+            raise KeyError(name)
+
+        offset, length = found
+        start = offset + RECORD_HEADER.size + len(name_bytes)
+        end = offset + length
+        if self._map is not None:
+            return self._map[start:end]
+
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def get(self, name: str):
+        return BinSerializer.deserialize(self.get_raw(name))
+
+    def __getitem__(self, name: str):
+        return self.get(name)
+
+    def names(self) -> Iterator[str]:
+        if self.mode == "a":
+            offsets = [offset for entries in self._entries.values() for offset, _ in entries]
+        else:
+            offsets = [self._entry(i)[1] for i in range(self._count)]
+        for offset in sorted(offsets):
+            yield self._read_name(offset).decode("utf-8")
+
+    def append_raw(self, name: str, payload: bytes):
+        if self.mode != "a":
+            raise ValueError("Archive is opened read-only")
+
+        name_bytes = name.encode("utf-8")
+        header = RECORD_HEADER.pack(RECORD_MAGIC, len(name_bytes), len(payload), zlib.crc32(payload))
+        record = header + name_bytes + payload
+
+        offset = self._index_offset
+        self._file.seek(offset)
+        self._file.write(record)
+        self._index_offset += len(record)
+        self._live += len(record)
+        self._dirty = True
+
+        name_hash = _name_hash(name_bytes)
+        entries = self._entries.setdefault(name_hash, [])
+        for i, (old_offset, old_length) in enumerate(entries):
+            if self._read_name(old_offset) == name_bytes:
+                entries[i] = (offset, len(record))
+                self._live -= old_length
+                break
+        else:
+            entries.append((offset, len(record)))
+
+    def append(self, name: str, obj):
+        self.append_raw(name, BinSerializer.serialize(obj))
+
+    def flush(self):
+        if self.mode != "a" or not self._dirty:
+            return
+
+        index = sorted(
+            (name_hash, offset, length)
+            for name_hash, entries in self._entries.items()
+            for offset, length in entries
+        )
+        footer = _footer(index, self._index_offset)
+        self._file.seek(self._index_offset)
+        self._file.write(footer)
+        self._file.flush()
+        self._index_offset += len(footer)
+        self._dirty = False
+
+    def _compacted_size(self) -> int:
+        count = sum(len(entries) for entries in self._entries.values())
+        return len(MAGIC) + self._live + count * INDEX_ENTRY.size + TRAILER.size
+
+    def compact(self):
+        if self.mode != "a":
+            raise ValueError("Archive is opened read-only")
+
+        records = [entry for entries in self._entries.values() for entry in entries]
+        self._file.flush()
+        index_offset, index = _write_compacted(self.path, self._file, records)
+
+        self._file.close()
+        self._file = open(self.path, "rb+")
+        self._entries = {}
+        for name_hash, offset, length in index:
+            self._entries.setdefault(name_hash, []).append((offset, length))
+        self._index_offset = self._file.seek(0, os.SEEK_END)
+        self._dirty = False
+
+    def close(self):
+        if self._file is None:
+            return
+        if self.mode == "a":
+            self.flush()
+            # Every append session leaves the previous footer (and replaced
+            # records) behind; once they outweigh the live archive, rewrite it.
+            if self._index_offset > 2 * self._compacted_size():
+                self.compact()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self._file = None
+
+    @staticmethod
+    def rebuild_index(path: str) -> int:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not an archive: {path}")
+
+            size = os.fstat(f.fileno()).st_size
+            latest: Dict[bytes, Tuple[int, int]] = {}
+            offset = len(MAGIC)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                while offset + RECORD_HEADER.size <= size:
+                    magic, name_length, payload_length, crc = RECORD_HEADER.unpack_from(buf, offset)
+                    if magic != RECORD_MAGIC:
+                        end = _skip_footer(buf, offset, size)
+                        if end is None:
+                            break
+                        offset = end
+                        continue
+
+                    length = RECORD_HEADER.size + name_length + payload_length
+                    if offset + length > size:
+                        break
+
+                    start = offset + RECORD_HEADER.size
+                    if zlib.crc32(buf[start + name_length:offset + length]) != crc:
+                        break
+
+                    latest[buf[start:start + name_length]] = (offset, length)
+                    offset += length
+
+            index_offset, _ = _write_compacted(path, f, list(latest.values()))
+
+        return index_offset
@@ -0,0 +1,320 @@
+import argparse
+import io
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .archive import BinArchive
+from .binary import BinSerializer
+from .corpus import make_schedule
+from .hcl import HclParser
+from .index import build_index
+from .parallel import deserialize_parallel, parse_parallel
+from .pipeline import publish, run_stage
+from .stream import convert_stream
+from .toml_serializer import IncrementalTomlSerializer, TomlSerializer
+
+
+def measure_time(func, iterations=100):
+    start_time = time.time()
+    for _ in range(iterations):
+        func()
+    end_time = time.time()
+    return (end_time - start_time) * 1000
+
+
+def report(name: str, elapsed_ms: float, iterations: int, size: int):
+    throughput = size * iterations / (elapsed_ms / 1000) / 1024 / 1024
+    print(f"{name}: {elapsed_ms / iterations:.2f} мс, {throughput:.2f} МБ/с")
+
+
+def bench_stream(days: int = 2000, iterations: int = 5):
+    text = make_schedule(days)
+    size = len(text.encode("utf-8"))
+    print(f"Потоковый конвертер против HclParser + TomlSerializer ({size / 1024:.0f} КБ)")
+
+    def tree():
+        TomlSerializer.serialize(HclParser(text).parse())
+
+    def lines():
+        convert_stream(io.StringIO(text), io.StringIO())
+
+    def lines_regex():
+        convert_stream(io.StringIO(text), io.StringIO(), regex=True)
+
+    report("HclParser + TomlSerializer", measure_time(tree, iterations), iterations, size)
+    report("iter_hcl_to_toml", measure_time(lines, iterations), iterations, size)
+    report("iter_hcl_to_toml_regex", measure_time(lines_regex, iterations), iterations, size)
+
+
+def bench_archive(entries: int = 1_000_000, lookups: int = 10_000):
+    payload = BinSerializer.serialize(HclParser(make_schedule(1)).parse())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "configs.har")
+
+        start_time = time.time()
+        with BinArchive(path, "a") as archive:
+            for i in range(entries):
+                archive.append_raw(f"config-{i}", payload)
+        print(f"Архив из {entries} документов: запись {time.time() - start_time:.2f} с, "
+              f"{os.path.getsize(path) / 1024 / 1024:.1f} МБ")
+
+        names = [f"config-{random.randrange(entries)}" for _ in range(lookups)]
+        with BinArchive(path) as archive:
+            start_time = time.perf_counter()
+            for name in names:
+                archive.get_raw(name)
+            elapsed = time.perf_counter() - start_time
+        print(f"Поиск документа по имени: {elapsed / lookups * 1_000_000:.2f} мкс")
+
+
+def _import_time(root: str, statement: str, runs: int):
+    pattern = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+    best_total = None
+    best_modules = {}
+
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=root, capture_output=True, text=True, check=True,
+        )
+        total = 0
+        modules = {}
+        for cumulative, indent, module in pattern.findall(result.stderr):
+            if len(indent) == 1:
+                total += int(cumulative)
+                modules[module] = int(cumulative)
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+
+    return best_total, best_modules
+
+
+def bench_import_time(runs: int = 5):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    package = __package__ or "lab4"
+    baseline, baseline_modules = _import_time(root, "pass", runs)
+
+    for statement in (f"import {package}", f"import {package}.main", f"from {package} import HclParser"):
+        total, modules = _import_time(root, statement, runs)
+        print(f"{statement}: {(total - baseline) / 1000:.2f} мс")
+        for module, cumulative in modules.items():
+            if module not in baseline_modules:
+                print(f"  {module}: {cumulative / 1000:.2f} мс")
+
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, "-m", package, "--help"], cwd=root, capture_output=True, check=True)
+    elapsed = (time.perf_counter() - start_time) / runs
+    print(f"python -m {package} --help: {elapsed * 1000:.2f} мс")
+
+
+def bench_memory(days: int = 1000):
+    text = make_schedule(days, lectures=4)
+    print(f"Память дерева разбора, {len(text.encode('utf-8')) / 1024 / 1024:.1f} МБ HCL")
+
+    for name, options in (("обычное", {}), ("intern", {"intern": True}), ("frozen", {"frozen": True})):
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        parser = HclParser(text, **options)
+        tree = parser.parse()
+        elapsed = time.perf_counter() - start_time
+        del parser
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start_time = time.perf_counter()
+        BinSerializer.serialize(tree)
+        serialize_time = time.perf_counter() - start_time
+        del tree
+
+        print(f"{name}: дерево {retained / 1024 / 1024:.2f} МБ, пик {peak / 1024 / 1024:.2f} МБ, "
+              f"разбор {elapsed * 1000:.0f} мс, BinSerializer {serialize_time * 1000:.0f} мс")
+
+
+def bench_parallel(days: int = 20000, max_workers: int = None):
+    text = make_schedule(days)
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Параллельный разбор, {len(text.encode('utf-8')) / 1024 / 1024:.1f} МБ HCL")
+
+    start_time = time.perf_counter()
+    expected = HclParser(text).parse()
+    serial = time.perf_counter() - start_time
+    print(f"HclParser: {serial * 1000:.0f} мс")
+
+    workers = 1
+    while True:
+        start_time = time.perf_counter()
+        result = parse_parallel(text, workers=workers, min_chunk_size=1 << 16)
+        elapsed = time.perf_counter() - start_time
+        status = "совпадает" if result == expected else "ОТЛИЧАЕТСЯ"
+        print(f"parse_parallel, {workers} проц.: {elapsed * 1000:.0f} мс, x{serial / elapsed:.2f}, {status}")
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+
+def bench_mmap(days: int = 20000):
+    text = make_schedule(days)
+    size = len(text.encode("utf-8"))
+    print(f"Разбор файла через mmap, {size / 1024 / 1024:.1f} МБ HCL")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schedule.hcl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+        def read_and_parse():
+            with open(path, "r", encoding="utf-8") as f:
+                return HclParser(f.read()).parse()
+
+        start_time = time.perf_counter()
+        expected = read_and_parse()
+        report("read() + HclParser", (time.perf_counter() - start_time) * 1000, 1, size)
+
+        with open(path, "rb") as f:
+            data = f.read()
+        for use_numpy in (False, True):
+            try:
+                start_time = time.perf_counter()
+                index = build_index(data, use_numpy)
+            except ImportError:
+                continue
+            name = "NumPy" if use_numpy else "re"
+            report(f"Структурный индекс ({name}, {len(index)} позиций)", (time.perf_counter() - start_time) * 1000, 1, size)
+
+        start_time = time.perf_counter()
+        result = HclParser.from_file(path).parse()
+        report("HclParser.from_file", (time.perf_counter() - start_time) * 1000, 1, size)
+        print("Результат совпадает" if result == expected else "Результат ОТЛИЧАЕТСЯ")
+
+
+def bench_publish(days: int = 2000):
+    text = make_schedule(days)
+    print(f"Публикация в TOML, XML и Binary, {len(text.encode('utf-8')) / 1024 / 1024:.1f} МБ HCL")
+
+    with tempfile.TemporaryDirectory() as directory:
+        outputs = {os.path.join(directory, f"schedule.{fmt}"): fmt for fmt in ("toml", "xml", "bin")}
+
+        start_time = time.perf_counter()
+        for path, fmt in outputs.items():
+            run_stage(fmt, HclParser(text).parse(), path)
+        print(f"Разбор для каждого формата, последовательно: {(time.perf_counter() - start_time) * 1000:.0f} мс")
+
+        for executor in ("thread", "process"):
+            start_time = time.perf_counter()
+            publish(text, outputs, executor=executor)
+            print(f"publish, executor={executor}: {(time.perf_counter() - start_time) * 1000:.0f} мс")
+
+
+def bench_incremental(days: int = 5000, edits: int = 5):
+    tree = HclParser(make_schedule(days)).parse()
+    serializer = IncrementalTomlSerializer()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schedule.toml")
+
+        start_time = time.perf_counter()
+        serializer.write(tree, path)
+        print(f"Первая запись ({os.path.getsize(path) / 1024 / 1024:.1f} МБ TOML): "
+              f"{(time.perf_counter() - start_time) * 1000:.0f} мс")
+
+        for attempt in range(2):
+            start_time = time.perf_counter()
+            serializer.write(tree, path)
+            print(f"Запись без изменений ({attempt + 1}): {(time.perf_counter() - start_time) * 1000:.0f} мс")
+
+        for edit in range(edits):
+            index = random.randrange(days)
+            changed = [("schedule", index, f"day{index}", 0, "lecture", 0, "room")]
+            tree["schedule"][index][f"day{index}"][0]["lecture"][0]["room"] = f"{edit} (ауд.)" * (edit % 2 + 1)
+
+            start_time = time.perf_counter()
+            TomlSerializer.serialize(tree)
+            full = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            rewritten = serializer.write(tree, path)
+            incremental = time.perf_counter() - start_time
+
+            tree["schedule"][index][f"day{index}"][0]["lecture"][0]["room"] = "1328"
+            serializer.write(tree, path)
+            start_time = time.perf_counter()
+            serializer.write(tree, path, changed=changed)
+            with_paths = time.perf_counter() - start_time
+
+            print(f"Правка {edit + 1}: TomlSerializer {full * 1000:.0f} мс, "
+                  f"IncrementalTomlSerializer {incremental * 1000:.0f} мс, "
+                  f"с changed {with_paths * 1000:.1f} мс, перезаписано {rewritten / 1024:.0f} КБ")
+
+        expected = TomlSerializer.serialize(tree).encode("utf-8")
+        with open(path, "rb") as f:
+            print("Файл совпадает с TomlSerializer" if f.read() == expected else "Файл ОТЛИЧАЕТСЯ от TomlSerializer")
+
+
+def bench_bin_parallel(megabytes: int = 128, max_workers: int = None, threshold: int = 10_000):
+    max_workers = max_workers or os.cpu_count() or 1
+    record = HclParser(make_schedule(1)).parse()["schedule"][0]["day0"][0]["lecture"][0]
+    record_size = len(BinSerializer.serialize(record))
+    records = [dict(record, time=f"{i % 24:02d}:{i % 60:02d}", id=i) for i in range(megabytes * 1024 * 1024 // record_size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "records.bin")
+        with open(path, "wb") as f:
+            f.write(BinSerializer.serialize({"records": records}, index_threshold=threshold))
+        del records
+
+        with open(path, "rb") as f:
+            data = f.read()
+        print(f"Параллельное чтение Binary, {len(data) / 1024 / 1024:.0f} МБ, порог {threshold} элементов")
+
+        start_time = time.perf_counter()
+        expected = BinSerializer.deserialize(data)
+        serial = time.perf_counter() - start_time
+        print(f"BinSerializer.deserialize: {serial * 1000:.0f} мс")
+
+        workers = 1
+        while True:
+            start_time = time.perf_counter()
+            result = deserialize_parallel(data, workers=workers, threshold=threshold)
+            elapsed = time.perf_counter() - start_time
+            status = "совпадает" if result == expected else "ОТЛИЧАЕТСЯ"
+            print(f"deserialize_parallel, {workers} проц.: {elapsed * 1000:.0f} мс, x{serial / elapsed:.2f}, {status}")
+            del result
+            if workers >= max_workers:
+                break
+            workers = min(workers * 2, max_workers)
+
+
+BENCHMARKS = {
+    "stream": bench_stream,
+    "archive": bench_archive,
+    "import": bench_import_time,
+    "memory": bench_memory,
+    "parallel": bench_parallel,
+    "mmap": bench_mmap,
+    "publish": bench_publish,
+    "incremental": bench_incremental,
+    "bin-parallel": bench_bin_parallel,
+}
+
+
+def run(names=()):
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Неизвестный бенчмарк: {name} (доступны: {', '.join(BENCHMARKS)})")
+    for name in names or BENCHMARKS:
+        print("-" * 50)
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Бенчмарки конвертеров")
+    arg_parser.add_argument("names", nargs="*", metavar="name", help=", ".join(BENCHMARKS))
+    run(arg_parser.parse_args().names)
@@ -1,5 +1,9 @@
 import struct
 
+from . import instrument
+from .frozen import FrozenDict
+
+
 class BinTypes:
     TSTR = 0x01
     TLIST = 0x02
@@ -7,19 +11,44 @@ class BinTypes:
     TINT = 0x04
     TFLOAT = 0x05
     TBOOL = 0x06
+    TLIST_INDEXED = 0x07
+    TDICT_INDEXED = 0x08
 
 class BinSerializer:
     @staticmethod
-    def serialize(obj):
+    def serialize(obj, index_threshold=None):
+        with instrument.stage("serialize.bin") as stage:
+            memo = {} if isinstance(obj, FrozenDict) else None
+            result = BinSerializer._serialize(obj, memo, index_threshold)
+            if stage:
+                stage.defer("nodes", instrument.count_nodes, obj)
+                stage.bytes = len(result)
+        return result
+
+    @staticmethod
+    def _serialize(obj, memo=None, index_threshold=None):
+        if memo is not None and isinstance(obj, (str, FrozenDict, tuple)):
+            cached = memo.get(id(obj))
+            if cached is None:
+                match obj:
+                    case str():
+                        cached = BinSerializer._sstring(obj)
+                    case dict():
+                        cached = BinSerializer._sdict(obj, memo, index_threshold)
+                    case _:
+                        cached = BinSerializer._slist(obj, memo, index_threshold)
+                memo[id(obj)] = cached
+            return cached
+
         match obj:
             case bool():
                 return BinSerializer._sbool(obj)
             case str():
                 return BinSerializer._sstring(obj)
             case dict():
-                return BinSerializer._sdict(obj)
-            case list():
-                return BinSerializer._slist(obj)
+                return BinSerializer._sdict(obj, memo, index_threshold)
+            case list() | tuple():
+                return BinSerializer._slist(obj, memo, index_threshold)
             case int():
                 return BinSerializer._sint(obj)
             case float():
@@ -34,24 +63,40 @@ class BinSerializer:
         return struct.pack(">BI", BinTypes.TSTR, length) + utf8_bytes
 
     @staticmethod
-    def _sdict(d):
+    def _sdict(d, memo=None, index_threshold=None):
         items = []
         for key, value in d.items():
-            key_bytes = BinSerializer._sstring(key)
-            value_bytes = BinSerializer.serialize(value)
+            key_bytes = BinSerializer._sstring(key) if memo is None else BinSerializer._serialize(key, memo)
+            value_bytes = BinSerializer._serialize(value, memo, index_threshold)
             items.append(key_bytes + value_bytes)
 
         items_count = len(items)
+        if index_threshold is not None and items_count >= index_threshold:
+            return BinSerializer._sindexed(BinTypes.TDICT_INDEXED, items)
         header = struct.pack(">BI", BinTypes.TDICT, items_count)
         return header + b"".join(items)
 
     @staticmethod
-    def _slist(lst):
-        items = [BinSerializer.serialize(item) for item in lst]
+    def _slist(lst, memo=None, index_threshold=None):
+        items = [BinSerializer._serialize(item, memo, index_threshold) for item in lst]
         items_count = len(items)
+        if index_threshold is not None and items_count >= index_threshold:
+            return BinSerializer._sindexed(BinTypes.TLIST_INDEXED, items)
         header = struct.pack(">BI", BinTypes.TLIST, items_count)
         return header + b"".join(items)
 
+    @staticmethod
+    def _sindexed(type_code, items):
+        # type, items count, payload length, then one offset per item
+        # relative to the start of the payload.
+        offsets = []
+        offset = 0
+        for item in items:
+            offsets.append(offset)
+            offset += len(item)
+        header = struct.pack(f">BIQ{len(offsets)}Q", type_code, len(offsets), offset, *offsets)
+        return header + b"".join(items)
+
     @staticmethod
     def _sint(value):
         return struct.pack(">Bq", BinTypes.TINT, value)
@@ -66,62 +111,60 @@ class BinSerializer:
 
     @staticmethod
     def deserialize(data):
-        pos = 0
-
-        def read_bytes(n):
-            nonlocal pos
-            result = data[pos : pos + n]
-            pos += n
-            return result
+        with instrument.stage("deserialize.bin") as stage:
+            result = BinSerializer._deserialize(data)
+            if stage:
+                stage.defer("nodes", instrument.count_nodes, result)
+                stage.bytes = len(data)
+        return result
 
-        def peek_type():
-            return data[pos] if pos < len(data) else -1
+    @staticmethod
+    def _deserialize(data):
+        return BinSerializer._decode(data, 0)[0]
 
-        match peek_type():
+    @staticmethod
+    def _decode(data, pos):
+        match data[pos] if pos < len(data) else -1:
             case BinTypes.TSTR:
-                pos += 1
-                length = struct.unpack(">I", read_bytes(4))[0]
-                string_data = read_bytes(length)
-                return string_data.decode("utf-8")
-
-            case BinTypes.TDICT:
-                pos += 1
-                items_count = struct.unpack(">I", read_bytes(4))[0]
+                length = struct.unpack_from(">I", data, pos + 1)[0]
+                start = pos + 5
+                return str(data[start:start + length], "utf-8"), start + length
+
+            case BinTypes.TDICT | BinTypes.TDICT_INDEXED as type_code:
+                items_count = struct.unpack_from(">I", data, pos + 1)[0]
+                pos += 5
+                if type_code == BinTypes.TDICT_INDEXED:
+                    pos += 8 + 8 * items_count
                 result = {}
 
                 for _ in range(items_count):
-                    key = BinSerializer.deserialize(data[pos:])
-                    pos += len(BinSerializer.serialize(key))
-                    value = BinSerializer.deserialize(data[pos:])
-                    pos += len(BinSerializer.serialize(value))
+                    key, pos = BinSerializer._decode(data, pos)
+                    value, pos = BinSerializer._decode(data, pos)
                     result[key] = value
 
-                return result
+                return result, pos
 
-            case BinTypes.TLIST:
-                pos += 1
-                items_count = struct.unpack(">I", read_bytes(4))[0]
+            case BinTypes.TLIST | BinTypes.TLIST_INDEXED as type_code:
+                items_count = struct.unpack_from(">I", data, pos + 1)[0]
+                pos += 5
+                if type_code == BinTypes.TLIST_INDEXED:
+                    pos += 8 + 8 * items_count
                 result = []
 
                 for _ in range(items_count):
-                    item = BinSerializer.deserialize(data[pos:])
-                    item_size = len(BinSerializer.serialize(item))
-                    pos += item_size
+                    item, pos = BinSerializer._decode(data, pos)
                     result.append(item)
 
-                return result
+                return result, pos
 
             case BinTypes.TINT:
-                pos += 1
-                return struct.unpack(">q", read_bytes(8))[0]
+                return struct.unpack_from(">q", data, pos + 1)[0], pos + 9
 
             case BinTypes.TFLOAT:
-                pos += 1
-                return struct.unpack(">d", read_bytes(8))[0]
+                return struct.unpack_from(">d", data, pos + 1)[0], pos + 9
 
             case BinTypes.TBOOL:
-                pos += 1
-                return struct.unpack(">?", read_bytes(1))[0]
+                return struct.unpack_from(">?", data, pos + 1)[0], pos + 2
 
             case _:
                 raise ValueError("Unknown type in binary data")
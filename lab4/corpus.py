@@ -0,0 +1,18 @@
+LECTURE = """  lecture {{
+    time      = "{time}"
+    subject   = "Информатика"
+    lecturer  = "Миняев Илья Андреевич"
+    room      = "1328"
+    address   = "Кронверкский пр., д.49, лит.А"
+  }}
+"""
+
+
+def make_schedule(days: int, lectures: int = 2) -> str:
+    blocks = []
+    for day in range(days):
+        blocks.append(f'schedule "day{day}" {{\n')
+        for lecture in range(lectures):
+            blocks.append(LECTURE.format(time=f"{8 + lecture:02d}:{day % 60:02d}"))
+        blocks.append("}\n")
+    return "".join(blocks)
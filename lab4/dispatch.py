@@ -0,0 +1,222 @@
+import json
+import os
+import platform
+import sys
+import time
+
+
+SIZES = (1_024, 8_192, 65_536)
+
+FORMATS = ("toml", "xml", "bin")
+
+
+def serialize(tree, fmt):
+    if fmt == "toml":
+        from .toml_serializer import TomlSerializer
+        return TomlSerializer.serialize(tree)
+    if fmt == "xml":
+        from .xml_serializer import XMLSerializer
+        return XMLSerializer().serialize(tree)
+    if fmt == "bin":
+        from .binary import BinSerializer
+        return BinSerializer.serialize(tree)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def convert_custom(text, fmt):
+    from .hcl import HclParser
+
+    return serialize(HclParser(text).parse(), fmt)
+
+
+def _hcl2_convert(text, fmt):
+    import hcl2
+    import rtoml
+
+    return rtoml.dumps(hcl2.loads(text))
+
+
+def _load(output, fmt):
+    if fmt == "toml":
+        import tomllib
+        return tomllib.loads(output)
+    if fmt == "xml":
+        from xml.etree import ElementTree
+        return ElementTree.canonicalize(output)
+    if fmt == "bin":
+        from .binary import BinSerializer
+        return BinSerializer.deserialize(output)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+class Backend:
+    def __init__(self, name, formats, convert, requires=()):
+        self.name = name
+        self.formats = tuple(formats)
+        self.convert = convert
+        self.requires = tuple(requires)
+        self._available = None
+
+    def __repr__(self):
+        return f"Backend({self.name!r}, formats={self.formats!r})"
+
+    def available(self):
+        if self._available is None:
+            from importlib.util import find_spec
+            self._available = all(find_spec(module) is not None for module in self.requires)
+        return self._available
+
+    def mark_unavailable(self):
+        self._available = False
+
+
+def default_backends():
+    return [
+        Backend("custom", FORMATS, convert_custom),
+        Backend("hcl2", ("toml",), _hcl2_convert, requires=("hcl2", "rtoml")),
+    ]
+
+
+def default_cache_path():
+    cache_dir = os.environ.get("LAB4_CACHE_DIR")
+    if not cache_dir:
+        cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "lab4")
+    return os.path.join(cache_dir, "dispatch.json")
+
+
+class Dispatcher:
+    def __init__(self, backends=None, cache_path=None, sizes=SIZES, iterations=3):
+        self.backends = {}
+        self.cache_path = cache_path or default_cache_path()
+        self.sizes = tuple(sorted(sizes))
+        self.iterations = iterations
+        self._timings = None
+
+        for backend in default_backends() if backends is None else backends:
+            self.register(backend)
+
+    def register(self, backend):
+        self.backends[backend.name] = backend
+        self._timings = None
+
+    def candidates(self, fmt):
+        return [backend for backend in self.backends.values() if fmt in backend.formats and backend.available()]
+
+    def _cache_key(self):
+        names = ",".join(sorted(backend.name for backend in self.backends.values() if backend.available()))
+        return f"v2-{sys.implementation.cache_tag}-{platform.machine()}-{names}-{','.join(map(str, self.sizes))}"
+
+    def _load_cache(self, key):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("key") != key:
+            return None
+        return cached.get("timings")
+
+    def _save_cache(self, key, timings):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "timings": timings}, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _measure(self, backend, text, fmt, expected):
+        # Only backends producing the same document as the reference engine
+        # are timed; the rest never take part in routing for this format.
+        try:
+            if _load(backend.convert(text, fmt), fmt) != expected:
+                return None
+        except ImportError:
+            backend.mark_unavailable()
+            return None
+        except Exception:
+            return None
+
+        best = None
+        for _ in range(self.iterations):
+            start_time = time.perf_counter()
+            backend.convert(text, fmt)
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def calibrate(self, force=False):
+        key = self._cache_key()
+        if not force:
+            timings = self._load_cache(key)
+            if timings is not None:
+                self._timings = timings
+                return timings
+
+        from .corpus import make_schedule
+
+        samples = {}
+        for size in self.sizes:
+            days = 1
+            text = make_schedule(days)
+            while len(text) < size:
+                days *= 2
+                text = make_schedule(days)
+            samples[size] = text
+
+        timings = {}
+        for fmt in FORMATS:
+            expected = {size: _load(convert_custom(text, fmt), fmt) for size, text in samples.items()}
+            for backend in self.candidates(fmt):
+                for size, text in samples.items():
+                    elapsed = self._measure(backend, text, fmt, expected[size])
+                    if elapsed is not None:
+                        timings.setdefault(fmt, {}).setdefault(str(size), {})[backend.name] = elapsed
+
+        self._timings = timings
+        self._save_cache(key, timings)
+        return timings
+
+    def route(self, size, fmt="toml"):
+        candidates = self.candidates(fmt)
+        if len(candidates) <= 1:
+            return candidates
+
+        if self._timings is None:
+            self.calibrate()
+
+        bucket = next((limit for limit in self.sizes if size <= limit), self.sizes[-1])
+        measured = self._timings.get(fmt, {}).get(str(bucket), {})
+        verified = [backend for backend in candidates if backend.name in measured]
+        return sorted(verified or candidates, key=lambda backend: measured.get(backend.name, float("inf")))
+
+    def convert(self, text, fmt="toml"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+        for backend in self.route(len(text), fmt):
+            try:
+                return backend.convert(text, fmt)
+            except ImportError:
+                backend.mark_unavailable()
+
+        raise RuntimeError(f"No available backend for format: {fmt}")
+
+
+_dispatcher = None
+
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher()
+    return _dispatcher
+
+
+def register_backend(backend):
+    get_dispatcher().register(backend)
+
+
+def convert(text, fmt="toml"):
+    return get_dispatcher().convert(text, fmt)
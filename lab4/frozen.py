@@ -0,0 +1,58 @@
+import struct
+
+
+class FrozenDict(dict):
+    __slots__ = ("_hash",)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __repr__(self):
+        return f"FrozenDict({dict.__repr__(self)})"
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(obj, strings=None):
+    if strings is None:
+        strings = {}
+    scalars = {}
+    nodes = {}
+
+    def canonical(value):
+        if isinstance(value, str):
+            return strings.setdefault(value, value)
+
+        if isinstance(value, dict):
+            items = [(canonical(key), canonical(item)) for key, item in value.items()]
+            key = (FrozenDict, tuple((k, id(v)) for k, v in items))
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = FrozenDict(items)
+            return node
+
+        if isinstance(value, (list, tuple)):
+            items = [canonical(item) for item in value]
+            key = (tuple, tuple(id(item) for item in items))
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = tuple(items)
+            return node
+
+        if isinstance(value, float):
+            # 0.0 == -0.0, so floats are merged by bit pattern, not equality.
+            return scalars.setdefault((type(value), struct.pack(">d", value)), value)
+        return scalars.setdefault((type(value), value), value)
+
+    return canonical(obj)
@@ -1,5 +1,10 @@
+import mmap
+import os
 from enum import Enum, auto
 
+from . import instrument
+from .frozen import freeze
+
 
 class HclTokenType(Enum):
     L_BRACE = auto()
@@ -12,12 +17,48 @@ class HclTokenType(Enum):
 
 
 class HclParser:
-    def __init__(self, raw_data):
-        self.tokens = self._tokenize(raw_data)
+    def __init__(self, raw_data, intern=False, frozen=False):
+        self.frozen = frozen
+        self.strings = {} if intern or frozen else None
+        with instrument.stage("tokenize") as stage:
+            if isinstance(raw_data, str):
+                self.tokens = self._tokenize(raw_data, self.strings)
+            else:
+                from .index import tokenize_bytes
+                self.tokens = tokenize_bytes(raw_data, self.strings)
+            if stage:
+                stage.tokens = len(self.tokens)
+                if isinstance(raw_data, str):
+                    stage.defer("bytes", instrument.utf8_length, raw_data)
+                else:
+                    stage.bytes = len(raw_data)
         self.pos = 0
 
+    @classmethod
+    def from_file(cls, path, intern=False, frozen=False):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls("", intern=intern, frozen=frozen)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return cls(buf, intern=intern, frozen=frozen)
+
     @staticmethod
-    def _tokenize(data):
+    def _word_token(word, strings=None):
+        num_str = word
+        if num_str.startswith('-'):
+            num_str = num_str[1:]
+
+        if num_str.replace('.', '', 1).isdigit() and num_str.count('.') <= 1:
+            if '.' in word:
+                return HclTokenType.NUMBER, float(word)
+            return HclTokenType.NUMBER, int(word)
+
+        if strings is not None:
+            word = strings.setdefault(word, word)
+        return HclTokenType.IDENTIFIER, word
+
+    @staticmethod
+    def _tokenize(data, strings=None):
         tokens = []
         current_token = ""
         in_quotes = False
@@ -25,17 +66,7 @@ class HclParser:
         def save_identifier():
             nonlocal current_token
             if current_token:
-                num_str = current_token
-                if num_str.startswith('-'):
-                    num_str = num_str[1:]
-
-                if num_str.replace('.', '', 1).isdigit() and num_str.count('.') <= 1:
-                    if '.' in current_token:
-                        tokens.append((HclTokenType.NUMBER, float(current_token)))
-                    else:
-                        tokens.append((HclTokenType.NUMBER, int(current_token)))
-                else:
-                    tokens.append((HclTokenType.IDENTIFIER, current_token))
+                tokens.append(HclParser._word_token(current_token, strings))
                 current_token = ""
 
         i = 0
@@ -45,6 +76,8 @@ class HclParser:
             if in_quotes:
                 if char == '"':
                     in_quotes = False
+                    if strings is not None:
+                        current_token = strings.setdefault(current_token, current_token)
                     tokens.append((HclTokenType.STRING, current_token))
                     current_token = ""
                 else:
@@ -86,7 +119,14 @@ class HclParser:
         return token
 
     def parse(self):
-        return self._parse_body()
+        with instrument.stage("parse") as stage:
+            result = self._parse_body()
+            if self.frozen:
+                result = freeze(result, self.strings)
+            if stage:
+                stage.tokens = len(self.tokens)
+                stage.defer("nodes", instrument.count_nodes, result)
+        return result
 
     def _parse_body(self, context=None):
         if context is None:
@@ -0,0 +1,138 @@
+import re
+from array import array
+from bisect import bisect_right
+
+from .hcl import HclParser, HclTokenType
+
+
+QUOTE = ord('"')
+L_BRACE = ord("{")
+R_BRACE = ord("}")
+EQUALS = ord("=")
+
+# Newlines are only separators between words, which _SEPARATORS already
+# handles, so they are left out of the index.
+STRUCTURAL = b'"{}='
+BLOCK_SIZE = 1 << 24
+
+_STRUCTURAL_PATTERN = re.compile(rb'["{}=]')
+_SEPARATORS = bytes.maketrans(b"\t\n", b"  ")
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _regex_index(buf, start, end):
+    return array("q", (match.start() for match in _STRUCTURAL_PATTERN.finditer(buf, start, end)))
+
+
+def _numpy_indexer(np):
+    table = np.zeros(256, dtype=bool)
+    table[list(STRUCTURAL)] = True
+
+    def index(buf, start, end):
+        data = np.frombuffer(buf, dtype=np.uint8, count=end - start, offset=start)
+        found = np.flatnonzero(table[data]).astype(np.int64)
+        found += start
+        del data
+        return array("q", found.tobytes())
+
+    return index
+
+
+def _indexer(use_numpy):
+    np = _numpy() if use_numpy is None or use_numpy else None
+    if use_numpy and np is None:
+        raise ImportError("NumPy is required for use_numpy=True")
+    return _numpy_indexer(np) if np is not None else _regex_index
+
+
+def build_index(buf, use_numpy=None, block_size=BLOCK_SIZE):
+    index = _indexer(use_numpy)
+    positions = array("q")
+    for start in range(0, len(buf), block_size):
+        positions.extend(index(buf, start, min(start + block_size, len(buf))))
+    return positions
+
+
+def tokenize_bytes(buf, strings=None, index=None, use_numpy=None, block_size=BLOCK_SIZE):
+    # The index is built one window of block_size bytes at a time, so only
+    # the positions of the current window are held in memory.
+    size = len(buf)
+    if index is None:
+        indexer = _indexer(use_numpy)
+    else:
+        block_size = max(size, 1)
+
+        def indexer(buf, start, end):
+            return index
+
+    tokens = []
+    word_token = HclParser._word_token
+    decoded = {} if strings is not None else None
+    pos = 0
+
+    def decode(raw):
+        if decoded is None:
+            return raw.decode("utf-8")
+        text = decoded.get(raw)
+        if text is None:
+            text = raw.decode("utf-8")
+            text = decoded[raw] = strings.setdefault(text, text)
+        return text
+
+    def words(start, end):
+        for word in buf[start:end].translate(_SEPARATORS).split(b" "):
+            if word:
+                tokens.append(word_token(decode(word), strings))
+
+    window = 0
+    while window < size:
+        window_end = min(window + block_size, size)
+        positions = indexer(buf, window, window_end)
+        window = window_end
+        count = len(positions)
+        i = 0
+
+        while i < count:
+            p = positions[i]
+            char = buf[p]
+            if p > pos:
+                words(pos, p)
+
+            if char == QUOTE:
+                end = buf.find(b'"', p + 1)
+                if end < 0:
+                    if p + 1 < size:
+                        tokens.append(word_token(decode(buf[p + 1:size]), strings))
+                    pos = window = size
+                    break
+                tokens.append((HclTokenType.STRING, decode(buf[p + 1:end])))
+                pos = end + 1
+                if end >= window_end:
+                    # The string runs past this window: index again from
+                    # just after it.
+                    window = pos
+                    break
+                i = bisect_right(positions, end, i + 1)
+                continue
+
+            if char == L_BRACE:
+                tokens.append((HclTokenType.L_BRACE, "{"))
+            elif char == R_BRACE:
+                tokens.append((HclTokenType.R_BRACE, "}"))
+            elif char == EQUALS:
+                tokens.append((HclTokenType.EQUALS, "="))
+            pos = p + 1
+            i += 1
+
+    if pos < size:
+        words(pos, size)
+
+    tokens.append((HclTokenType.EOF, ""))
+    return tokens
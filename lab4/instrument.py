@@ -0,0 +1,229 @@
+import time
+from contextlib import contextmanager
+
+
+class StageMetrics:
+    def __init__(self, stage):
+        self.stage = stage
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.tokens = None
+        self.nodes = None
+        self.bytes = None
+        self.peak_memory = None
+        self._deferred = []
+
+    def __bool__(self):
+        return True
+
+    def defer(self, name, func, *args):
+        # Counters that walk the data are computed after the clocks stop,
+        # so their cost is not reported as stage time.
+        self._deferred.append((name, func, args))
+
+    @property
+    def throughput(self):
+        if self.bytes is None or self.wall_time <= 0:
+            return None
+        return self.bytes / self.wall_time
+
+    def as_dict(self):
+        result = {
+            "stage": self.stage,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+        }
+        for name in ("tokens", "nodes", "bytes", "peak_memory", "throughput"):
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        return result
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class LogExporter:
+    def __init__(self, logger=None, level=None):
+        import logging
+
+        self.logger = logger or logging.getLogger("lab4.instrument")
+        self.level = logging.INFO if level is None else level
+
+    def export(self, metrics):
+        parts = [f"{key}={value}" for key, value in metrics.as_dict().items() if key != "stage"]
+        self.logger.log(self.level, "%s: %s", metrics.stage, " ".join(parts))
+
+
+class JsonLinesExporter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def export(self, metrics):
+        import json
+
+        self.stream.write(json.dumps(metrics.as_dict(), ensure_ascii=False) + "\n")
+
+
+class PrometheusExporter:
+    COUNTERS = ("wall_time", "cpu_time", "tokens", "nodes", "bytes")
+
+    def __init__(self, prefix="lab4"):
+        self.prefix = prefix
+        self._totals = {}
+        self._calls = {}
+        self._peaks = {}
+
+    def export(self, metrics):
+        totals = self._totals.setdefault(metrics.stage, {})
+        for name in self.COUNTERS:
+            value = getattr(metrics, name)
+            if value is not None:
+                totals[name] = totals.get(name, 0) + value
+        self._calls[metrics.stage] = self._calls.get(metrics.stage, 0) + 1
+        if metrics.peak_memory is not None:
+            self._peaks[metrics.stage] = max(self._peaks.get(metrics.stage, 0), metrics.peak_memory)
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, samples):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for stage, value in samples:
+                lines.append(f'{metric}{{stage="{stage}"}} {value}')
+
+        family("stage_calls_total", "counter", sorted(self._calls.items()))
+        for name in self.COUNTERS:
+            samples = [(stage, totals[name]) for stage, totals in sorted(self._totals.items()) if name in totals]
+            if samples:
+                suffix = "seconds_total" if name.endswith("_time") else "total"
+                family(f"stage_{name.replace('_time', '')}_{suffix}", "counter", samples)
+        if self._peaks:
+            family("stage_peak_memory_bytes", "gauge", sorted(self._peaks.items()))
+
+        return "\n".join(lines) + "\n"
+
+
+class Instrumentation:
+    def __init__(self, exporters=(), trace_memory=False):
+        self.exporters = list(exporters)
+        self.trace_memory = trace_memory
+        self.records = []
+        self._memory_frames = []
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def emit(self, metrics):
+        self.records.append(metrics)
+        for exporter in self.exporters:
+            exporter.export(metrics)
+
+    @contextmanager
+    def stage(self, name):
+        metrics = StageMetrics(name)
+        started_tracing = False
+        if self.trace_memory:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                # reset_peak() is global: fold the peak reached so far into
+                # every enclosing stage before starting a fresh window.
+                peak = tracemalloc.get_traced_memory()[1]
+                for frame in self._memory_frames:
+                    frame[1] = max(frame[1], peak)
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            current = tracemalloc.get_traced_memory()[0]
+            frame = [current, current]
+            self._memory_frames.append(frame)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_time = time.perf_counter() - wall_start
+            metrics.cpu_time = time.process_time() - cpu_start
+            if self.trace_memory:
+                self._memory_frames = [other for other in self._memory_frames if other is not frame]
+                metrics.peak_memory = max(frame[1], tracemalloc.get_traced_memory()[1]) - frame[0]
+                if started_tracing:
+                    tracemalloc.stop()
+            for name, func, args in metrics._deferred:
+                setattr(metrics, name, func(*args))
+            metrics._deferred = []
+            self.emit(metrics)
+
+
+_active = None
+
+
+def active():
+    return _active
+
+
+def enable(instrumentation):
+    global _active
+    previous = _active
+    _active = instrumentation
+    return previous
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def stage(name):
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+
+@contextmanager
+def trace(name="conversion", exporters=(), trace_memory=False):
+    instrumentation = Instrumentation(exporters, trace_memory=trace_memory)
+    previous = enable(instrumentation)
+    try:
+        with instrumentation.stage(name) as total:
+            yield instrumentation
+            total.bytes = next((m.bytes for m in instrumentation.records if m.bytes is not None), None)
+    finally:
+        enable(previous)
+
+
+def utf8_length(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def count_nodes(obj):
+    count = 0
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return count
@@ -1,10 +1,9 @@
-from binary import BinSerializer
-from hcl import HclParser
-from toml import TomlSerializer
-from xml import XMLSerializer
+import os
+import sys
 import time
-import hcl2
-import rtoml
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 
 
 hcl_code = """
@@ -18,204 +17,254 @@ resource "aws_instance" "web" {
 }
 """
 
-# Обязательное задание
-
-print("-"*50)
-print("Обязательное задание")
-print("-"*50)
-
-def hcl_to_toml(input_text):
-    lines = input_text.splitlines()
-    result = []
-    path_stack = []
+schedule_code = """
+schedule "thursday" {
+  lecture {
+    time      = "08:10"
+    subject   = "Информатика"
+    lecturer  = "Миняев Илья Андреевич"
+    room      = "1328"
+    address   = "Кронверкский пр., д.49, лит.А"
+  }
 
-    for line in lines:
-        line = line.strip()
+  lecture {
+    time      = "09:50"
+    subject   = "Информатика"
+    lecturer  = "Миняев Илья Андреевич"
+    room      = "1328"
+    address   = "Кронверкский пр., д.49, лит.А"
+  }
+}
+"""
 
-        if not line or line.startswith(('#', '//')):
-            result.append(line)
-            continue
 
-        if '{' in line:
-            header = line.split('{')[0].strip()
-            parts = [p.strip('" ') for p in header.split() if p.strip()]
+def convert(text, fmt="toml"):
+    from .dispatch import convert_custom
 
-            path_stack.append(parts)
-            full_path = ".".join([".".join(p) if isinstance(p, list) else p for p in path_stack])
-            result.append(f"\n[{full_path}]")
+    return convert_custom(text, fmt)
 
-        elif '}' in line:
-            if path_stack:
-                path_stack.pop()
 
-        elif '=' in line:
-            result.append(line)
+def convert_hcl_to_toml_rtoml(hcl_text):
+    import hcl2
+    import rtoml
 
-    return "\n".join(result)
+    data = hcl2.loads(hcl_text)
+    toml_text = rtoml.dumps(data)
 
-print(hcl_to_toml(hcl_code))
+    return toml_text
 
-# Доп. 1
 
-print("-"*50)
-print("Доп. 1")
-print("-"*50)
+def measure_time(func, iterations=100):
+    start_time = time.time()
+    for _ in range(iterations):
+        func()
+    end_time = time.time()
+    return (end_time - start_time) * 1000
 
-def convert_hcl_to_toml_rtoml(hcl_text):
-    data = hcl2.loads(hcl_text)
-    toml_text = rtoml.dumps(data)
 
-    return toml_text
+def custom_parser_to_toml():
+    return convert(schedule_code, "toml")
 
-try:
-    print(convert_hcl_to_toml_rtoml(hcl_code))
-except Exception as e:
-    print(f"Ошибка при конвертации: {e}")
 
+def custom_parser_to_xml():
+    return convert(schedule_code, "xml")
 
 
-# Доп. 2
+def custom_parser_to_binary():
+    return convert(schedule_code, "bin")
 
-print("-"*50)
-print("Доп. 2")
-print("-"*50)
 
-import re
+def library_parser_to_toml():
+    return convert_hcl_to_toml_rtoml(schedule_code)
 
 
-def hcl_to_toml_regex(input_text):
-    lines = input_text.splitlines()
-    result = []
-    path_stack = []
+def demo():
+    from .pipeline import publish
+    from .stream import hcl_to_toml, hcl_to_toml_regex
 
-    block_pattern = re.compile(r'^([\w\s"]+)\s*\{$')
+    # Обязательное задание
 
-    kv_pattern = re.compile(r'^([\w\d_-]+)\s*=\s*(.*)$')
+    print("-"*50)
+    print("Обязательное задание")
+    print("-"*50)
+
+    print(hcl_to_toml(hcl_code))
 
-    for line in lines:
-        line = line.strip()
+    # Доп. 1
 
-        if not line or re.match(r'^(#|//)', line):
-            result.append(line)
-            continue
+    print("-"*50)
+    print("Доп. 1")
+    print("-"*50)
+
+    try:
+        print(convert_hcl_to_toml_rtoml(hcl_code))
+    except Exception as e:
+        print(f"Ошибка при конвертации: {e}")
 
-        block_match = block_pattern.match(line)
-        if block_match:
-            header = block_match.group(1).strip()
-            parts = re.findall(r'"([^"]*)"|(\S+)', header)
-            clean_parts = [p[0] if p[0] else p[1] for p in parts]
+    # Доп. 2
 
-            path_stack.append(clean_parts)
-            full_path = ".".join([".".join(p) for p in path_stack])
-            result.append(f"\n[{full_path}]")
-            continue
+    print("-"*50)
+    print("Доп. 2")
+    print("-"*50)
 
-        if line == '}':
-            if path_stack:
-                path_stack.pop()
-            continue
+    print(hcl_to_toml_regex(hcl_code))
 
-        kv_match = kv_pattern.match(line)
-        if kv_match:
-            key = kv_match.group(1).strip()
-            value = kv_match.group(2).strip()
-            result.append(f"{key} = {value}")
+    print("-"*50)
+    print("Измерение времени выполнения (100 итераций)")
+    print("-"*50)
 
-    return "\n".join(result)
+    time1 = measure_time(custom_parser_to_toml, 100)
+    print(f"1. Собственный парсер из HCL и сериализатор в TOML: {time1:.2f} мс")
 
-print(hcl_to_toml_regex(hcl_code))
+    time2 = measure_time(custom_parser_to_xml, 100)
+    print(f"2. Собственный сериализатор в XML: {time2:.2f} мс")
 
-hcl_code = """
-schedule "thursday" {
-  lecture {
-    time      = "08:10"
-    subject   = "Информатика"
-    lecturer  = "Миняев Илья Андреевич"
-    room      = "1328"
-    address   = "Кронверкский пр., д.49, лит.А"
-  }
+    time3 = measure_time(custom_parser_to_binary, 100)
+    print(f"3. Собственный сериализатор в Binary: {time3:.2f} мс")
 
-  lecture {
-    time      = "09:50"
-    subject   = "Информатика"
-    lecturer  = "Миняев Илья Андреевич"
-    room      = "1328"
-    address   = "Кронверкский пр., д.49, лит.А"
-  }
-}
-"""
+    try:
+        time4 = measure_time(library_parser_to_toml, 100)
+    except ImportError as e:
+        print(f"4. Библиотечный hcl2 в rtoml: недоступен ({e})")
+    else:
+        print(f"4. Библиотечный hcl2 в rtoml: {time4:.2f} мс")
 
-def measure_time(func, iterations=100):
-    start_time = time.time()
-    for _ in range(iterations):
-        func()
-    end_time = time.time()
-    return (end_time - start_time) * 1000
+        print("\nСравнение производительности:")
+        print(f"Скорость библиотечного решения относительно собственного (TOML): {time1/time4:.2f}x")
 
-def custom_parser_to_toml():
-    parser = HclParser(hcl_code)
-    parsed = parser.parse()
-    toml_data = TomlSerializer.serialize(parsed)
-    return toml_data
+    publish(schedule_code, {
+        os.path.join(DATA_DIR, "output.toml"): "toml",
+        os.path.join(DATA_DIR, "output.bin"): "bin",
+        os.path.join(DATA_DIR, "output.xml"): "xml",
+    })
 
-def custom_parser_to_xml():
-    parser = HclParser(hcl_code)
-    parsed = parser.parse()
-    xml_data = XMLSerializer().serialize(parsed)
-    return xml_data
+    try:
+        lib_toml = library_parser_to_toml()
+    except ImportError:
+        pass
+    else:
+        with open(os.path.join(DATA_DIR, "lib_output.toml"), "w", encoding="utf-8") as f:
+            f.write(lib_toml)
 
-def custom_parser_to_binary():
-    parser = HclParser(hcl_code)
-    parsed = parser.parse()
-    binary_data = BinSerializer.serialize(parsed)
-    return binary_data
 
-def library_parser_to_toml():
-    parsed = hcl2.loads(hcl_code)
-    toml_data = rtoml.dumps(parsed)
-    return toml_data
+def run_convert(args):
+    if args.stream or args.regex:
+        if args.format != "toml":
+            raise SystemExit("Потоковый режим поддерживает только TOML")
 
-print("-"*50)
-print("Измерение времени выполнения (100 итераций)")
-print("-"*50)
+        from .stream import convert_stream
 
-time1 = measure_time(custom_parser_to_toml, 100)
-print(f"1. Собственный парсер из HCL и сериализатор в TOML: {time1:.2f} мс")
+        with open(args.input, "r", encoding="utf-8") as source:
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as output:
+                    convert_stream(source, output, regex=args.regex)
+            else:
+                convert_stream(source, sys.stdout, regex=args.regex)
+                sys.stdout.write("\n")
+        return
 
-time2 = measure_time(custom_parser_to_xml, 100)
-print(f"2. Собственный сериализатор в XML: {time2:.2f} мс")
+    from . import dispatch
 
-time3 = measure_time(custom_parser_to_binary, 100)
-print(f"3. Собственный сериализатор в Binary: {time3:.2f} мс")
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
 
-time4 = measure_time(library_parser_to_toml, 100)
-print(f"4. Библиотечный hcl2 в rtoml: {time4:.2f} мс")
+    if args.backend == "auto":
+        result = dispatch.convert(text, args.format)
+    else:
+        backend = dispatch.get_dispatcher().backends.get(args.backend)
+        if backend is None or not backend.available():
+            raise SystemExit(f"Движок {args.backend} недоступен")
+        if args.format not in backend.formats:
+            raise SystemExit(f"Движок {args.backend} не поддерживает формат {args.format}")
+        result = backend.convert(text, args.format)
 
-print("\nСравнение производительности:")
-print(f"Скорость библиотечного решения относительно собственного (TOML): {time1/time4:.2f}x")
+    if isinstance(result, bytes):
+        if args.output:
+            with open(args.output, "wb") as f:
+                f.write(result)
+        else:
+            sys.stdout.buffer.write(result)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(result)
+    else:
+        print(result)
 
 
-parser = HclParser(hcl_code)
-parsed = parser.parse()
+def print_stage(result):
+    if result.stage == "parse":
+        print(f"parse: {result.elapsed * 1000:.2f} мс")
+    else:
+        print(f"{result.stage}: {result.path}, {result.size} байт, сериализация {result.elapsed * 1000:.2f} мс, "
+              f"запись {result.write_time * 1000:.2f} мс")
 
-toml = TomlSerializer.serialize(parsed)
 
-binary = BinSerializer.serialize(parsed)
-deserialized = BinSerializer.deserialize(binary)
+def run_publish(args):
+    from .pipeline import publish
 
-lib_parsed = hcl2.loads(hcl_code)
-lib_toml = rtoml.dumps(lib_parsed)
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    start_time = time.perf_counter()
+    publish(text, {path: None for path in args.outputs}, executor=args.executor, workers=args.workers, progress=print_stage)
+    print(f"Всего: {(time.perf_counter() - start_time) * 1000:.2f} мс")
+
+
+def run_bench(args):
+    from . import bench
+
+    bench.run(args.names)
+
+
+def run_calibrate(args):
+    from .dispatch import get_dispatcher
+
+    dispatcher = get_dispatcher()
+    timings = dispatcher.calibrate(force=True)
+    for fmt, buckets in timings.items():
+        for size, measured in buckets.items():
+            ranking = ", ".join(f"{name} {elapsed * 1000:.2f} мс" for name, elapsed in sorted(measured.items(), key=lambda item: item[1]))
+            print(f"{fmt} до {size} байт: {ranking}")
+    print(f"Кэш: {dispatcher.cache_path}")
+
+
+def main(argv=None):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(prog="lab4", description="Конвертер HCL в TOML, XML и бинарный формат")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="конвертировать HCL-файл")
+    convert_parser.add_argument("input", help="входной HCL-файл")
+    convert_parser.add_argument("-o", "--output", help="выходной файл (по умолчанию stdout)")
+    convert_parser.add_argument("-f", "--format", choices=("toml", "xml", "bin"), default="toml")
+    convert_parser.add_argument("-b", "--backend", default="auto", help="движок конвертации (auto, custom, hcl2)")
+    convert_parser.add_argument("--stream", action="store_true", help="построчный конвертер без построения дерева")
+    convert_parser.add_argument("--regex", action="store_true", help="построчный конвертер на регулярных выражениях")
+    convert_parser.set_defaults(handler=run_convert)
 
-xml = XMLSerializer().serialize(parsed)
+    publish_parser = commands.add_parser("publish", help="разобрать HCL один раз и записать несколько форматов")
+    publish_parser.add_argument("input", help="входной HCL-файл")
+    publish_parser.add_argument("outputs", nargs="+", help="выходные файлы (.toml, .xml, .bin)")
+    publish_parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    publish_parser.add_argument("-j", "--workers", type=int)
+    publish_parser.set_defaults(handler=run_publish)
 
-with open("data/output.toml", "w", encoding="utf-8") as f:
-    f.write(toml)
+    demo_parser = commands.add_parser("demo", help="демонстрация и замеры из лабораторной работы")
+    demo_parser.set_defaults(handler=lambda args: demo())
+
+    bench_parser = commands.add_parser("bench", help="бенчмарки")
+    bench_parser.add_argument("names", nargs="*", metavar="name")
+    bench_parser.set_defaults(handler=run_bench)
+
+    calibrate_parser = commands.add_parser("calibrate", help="замерить движки и обновить кэш выбора")
+    calibrate_parser.set_defaults(handler=run_calibrate)
 
-with open("data/output.bin", "wb") as f:
-    f.write(binary)
+    args = arg_parser.parse_args(argv)
+    args.handler(args)
 
-with open("data/lib_output.toml", "w", encoding="utf-8") as f:
-    f.write(lib_toml)
 
-with open("data/output.xml", "w", encoding="utf-8") as f:
-    f.write(xml)
\ No newline at end of file
+if __name__ == "__main__":
+    # The converter imports its modules relative to the lab4 package, which
+    # a plain script run does not have.
+    sys.exit(f"lab4 is a package now, run it as: python -m lab4 {' '.join(sys.argv[1:])}".rstrip())
@@ -0,0 +1,210 @@
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from . import instrument
+from .binary import BinSerializer, BinTypes
+from .frozen import freeze
+from .hcl import HclParser
+
+
+_STRUCTURE = re.compile(r'"[^"]*"?|[{}]')
+
+
+def split_top_level(text, chunks, min_chunk_size=0):
+    if chunks <= 1 or len(text) <= min_chunk_size:
+        return [text]
+
+    step = max(len(text) // chunks, min_chunk_size, 1)
+    target = step
+    bounds = [0]
+    depth = 0
+
+    for match in _STRUCTURE.finditer(text):
+        char = match.group()
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth < 0:
+                break
+            if depth == 0 and match.end() >= target:
+                if len(text) - match.end() < step // 2:
+                    break
+                bounds.append(match.end())
+                target = match.end() + step
+
+    bounds.append(len(text))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class _ChunkParser(HclParser):
+    def parse(self):
+        self.root = {}
+        self.assigned = set()
+        return self._parse_body(self.root), self.assigned
+
+    def _parse_attribute(self, key, context):
+        if context is self.root:
+            self.assigned.add(key)
+        super()._parse_attribute(key, context)
+
+
+def merge_bodies(parts):
+    result = {}
+    for part, assigned in parts:
+        for key, value in part.items():
+            if key in result and key not in assigned:
+                if isinstance(result[key], list):
+                    result[key].extend(value)
+                else:
+                    result[key] = [result[key]] + value
+            else:
+                result[key] = value
+    return result
+
+
+def _parse_chunk(text):
+    return _ChunkParser(text).parse()
+
+
+def parse_parallel(text, workers=None, min_chunk_size=1 << 20, chunks_per_worker=4, frozen=False, executor=None):
+    workers = workers or os.cpu_count() or 1
+
+    with instrument.stage("parse.parallel") as stage:
+        chunks = split_top_level(text, workers * chunks_per_worker, min_chunk_size)
+
+        if len(chunks) == 1 or workers == 1:
+            parts = [_parse_chunk(chunk) for chunk in chunks]
+        elif executor is not None:
+            parts = list(executor.map(_parse_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                parts = list(pool.map(_parse_chunk, chunks))
+
+        result = merge_bodies(parts)
+        if frozen:
+            result = freeze(result)
+
+        if stage:
+            stage.defer("bytes", instrument.utf8_length, text)
+            stage.defer("nodes", instrument.count_nodes, result)
+
+    return result
+
+
+_shared = None
+
+
+def _attach_shared(name):
+    global _shared
+    _shared = shared_memory.SharedMemory(name=name)
+
+
+def _decode_range(type_code, table_pos, items_pos, start, end):
+    buf = _shared.buf
+    result = []
+    for i in range(start, end):
+        pos = items_pos + struct.unpack_from(">Q", buf, table_pos + 8 * i)[0]
+        if type_code == BinTypes.TDICT_INDEXED:
+            key, pos = BinSerializer._decode(buf, pos)
+            value, _ = BinSerializer._decode(buf, pos)
+            result.append((key, value))
+        else:
+            result.append(BinSerializer._decode(buf, pos)[0])
+    return result
+
+
+class _ParallelDecoder:
+    def __init__(self, data, workers, threshold, chunks_per_worker):
+        self.data = data
+        self.workers = workers
+        self.threshold = threshold
+        self.chunks_per_worker = chunks_per_worker
+        self.shared = None
+        self.pool = None
+
+    def _executor(self):
+        if self.pool is None:
+            self.shared = shared_memory.SharedMemory(create=True, size=len(self.data))
+            self.shared.buf[:len(self.data)] = self.data
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_attach_shared, initargs=(self.shared.name,),
+            )
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.shared is not None:
+            self.shared.close()
+            self.shared.unlink()
+
+    def decode(self, pos):
+        data = self.data
+        type_code = data[pos]
+        if type_code not in (BinTypes.TLIST, BinTypes.TDICT, BinTypes.TLIST_INDEXED, BinTypes.TDICT_INDEXED):
+            return BinSerializer._decode(data, pos)
+
+        is_dict = type_code in (BinTypes.TDICT, BinTypes.TDICT_INDEXED)
+        items_count = struct.unpack_from(">I", data, pos + 1)[0]
+        pos += 5
+
+        if type_code in (BinTypes.TLIST_INDEXED, BinTypes.TDICT_INDEXED):
+            payload_length = struct.unpack_from(">Q", data, pos)[0]
+            table_pos = pos + 8
+            items_pos = table_pos + 8 * items_count
+            if items_count and items_count >= self.threshold:
+                result = self._decode_indexed(type_code, table_pos, items_pos, items_count)
+                return result, items_pos + payload_length
+            pos = items_pos
+
+        result = {} if is_dict else []
+        for _ in range(items_count):
+            if is_dict:
+                key, pos = BinSerializer._decode(data, pos)
+                result[key], pos = self.decode(pos)
+            else:
+                item, pos = self.decode(pos)
+                result.append(item)
+        return result, pos
+
+    def _decode_indexed(self, type_code, table_pos, items_pos, items_count):
+        pool = self._executor()
+        step = max(1, -(-items_count // (self.workers * self.chunks_per_worker)))
+        futures = [
+            pool.submit(_decode_range, type_code, table_pos, items_pos, start, min(start + step, items_count))
+            for start in range(0, items_count, step)
+        ]
+
+        if type_code == BinTypes.TDICT_INDEXED:
+            result = {}
+            for future in futures:
+                result.update(future.result())
+        else:
+            result = []
+            for future in futures:
+                result.extend(future.result())
+        return result
+
+
+def deserialize_parallel(data, workers=None, threshold=10_000, chunks_per_worker=4):
+    workers = workers or os.cpu_count() or 1
+
+    with instrument.stage("deserialize.bin.parallel") as stage:
+        if workers == 1 or len(data) == 0:
+            result = BinSerializer._deserialize(data)
+        else:
+            decoder = _ParallelDecoder(data, workers, threshold, chunks_per_worker)
+            try:
+                result = decoder.decode(0)[0]
+            finally:
+                decoder.close()
+
+        if stage:
+            stage.defer("nodes", instrument.count_nodes, result)
+            stage.bytes = len(data)
+
+    return result
@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from . import instrument
+from .dispatch import FORMATS, serialize
+from .hcl import HclParser
+
+
+EXTENSIONS = {".toml": "toml", ".xml": "xml", ".bin": "bin"}
+
+
+class StageResult:
+    def __init__(self, stage, path, size, elapsed, write_time=0.0):
+        self.stage = stage
+        self.path = path
+        self.size = size
+        self.elapsed = elapsed
+        self.write_time = write_time
+
+    def __repr__(self):
+        return (f"StageResult({self.stage!r}, {self.path!r}, size={self.size}, "
+                f"elapsed={self.elapsed:.4f}, write_time={self.write_time:.4f})")
+
+
+def format_for_path(path):
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot infer output format from file name: {path}")
+    return fmt
+
+
+def run_stage(fmt, tree, path):
+    start_time = time.perf_counter()
+    data = serialize(tree, fmt)
+    serialize_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    if isinstance(data, bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+        size = len(data)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+        size = len(data.encode("utf-8"))
+    write_time = time.perf_counter() - start_time
+
+    return StageResult(fmt, path, size, serialize_time, write_time)
+
+
+def publish(text, outputs, tree=None, executor="thread", workers=None, progress=None, frozen=True):
+    if isinstance(outputs, dict):
+        outputs = list(outputs.items())
+    outputs = [(path, fmt or format_for_path(path)) for path, fmt in outputs]
+    for path, fmt in outputs:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+    if tree is None:
+        start_time = time.perf_counter()
+        tree = HclParser(text, frozen=frozen).parse()
+        if progress is not None:
+            progress(StageResult("parse", None, len(text), time.perf_counter() - start_time))
+
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers or len(outputs) or 1)
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers or min(len(outputs), os.cpu_count() or 1) or 1)
+    else:
+        pool = executor
+
+    results = []
+    try:
+        with instrument.stage("publish") as stage:
+            futures = [pool.submit(run_stage, fmt, tree, path) for path, fmt in outputs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+            if stage:
+                stage.bytes = sum(result.size for result in results)
+    finally:
+        if pool is not executor:
+            pool.shutdown()
+
+    return results
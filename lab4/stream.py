@@ -0,0 +1,100 @@
+import re
+from typing import Iterable, Iterator, TextIO
+
+
+_BLOCK_PATTERN = re.compile(r'^([\w\s"]+)\s*\{$')
+_KV_PATTERN = re.compile(r'^([\w\d_-]+)\s*=\s*(.*)$')
+_LABEL_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _push(prefixes: list, parts: list) -> str:
+    path = ".".join(parts)
+    if prefixes:
+        path = prefixes[-1] + "." + path
+    prefixes.append(path)
+    return path
+
+
+def iter_hcl_to_toml(lines: Iterable[str]) -> Iterator[str]:
+    prefixes = []
+
+    for line in lines:
+        line = line.strip()
+
+        if not line or line.startswith(('#', '//')):
+            yield line
+            continue
+
+        if '{' in line:
+            header = line.split('{')[0].strip()
+            parts = [p.strip('" ') for p in header.split() if p.strip()]
+
+            yield ""
+            yield f"[{_push(prefixes, parts)}]"
+
+        elif '}' in line:
+            if prefixes:
+                prefixes.pop()
+
+        elif '=' in line:
+            yield line
+
+
+def iter_hcl_to_toml_regex(lines: Iterable[str]) -> Iterator[str]:
+    prefixes = []
+
+    for line in lines:
+        line = line.strip()
+
+        if not line or line.startswith(('#', '//')):
+            yield line
+            continue
+
+        block_match = _BLOCK_PATTERN.match(line)
+        if block_match:
+            header = block_match.group(1).strip()
+            parts = [p[0] if p[0] else p[1] for p in _LABEL_PATTERN.findall(header)]
+
+            yield ""
+            yield f"[{_push(prefixes, parts)}]"
+            continue
+
+        if line == '}':
+            if prefixes:
+                prefixes.pop()
+            continue
+
+        kv_match = _KV_PATTERN.match(line)
+        if kv_match:
+            key = kv_match.group(1).strip()
+            value = kv_match.group(2).strip()
+            yield f"{key} = {value}"
+
+
+def hcl_to_toml(input_text: str) -> str:
+    return "\n".join(iter_hcl_to_toml(input_text.splitlines()))
+
+
+def hcl_to_toml_regex(input_text: str) -> str:
+    return "\n".join(iter_hcl_to_toml_regex(input_text.splitlines()))
+
+
+def write_lines(lines: Iterable[str], output: TextIO) -> int:
+    count = 0
+    for line in lines:
+        if count:
+            output.write("\n")
+        output.write(line)
+        count += 1
+    return count
+
+
+def convert_stream(source: TextIO, output: TextIO, regex: bool = False) -> int:
+    converter = iter_hcl_to_toml_regex if regex else iter_hcl_to_toml
+    return write_lines(converter(source), output)
+
+
+def convert_file(source_path: str, output_path: str, regex: bool = False, encoding: str = "utf-8") -> int:
+    with open(source_path, "r", encoding=encoding) as source, \
+            open(output_path, "w", encoding=encoding) as output:
+        return convert_stream(source, output, regex)
@@ -0,0 +1,576 @@
+import hashlib
+import os
+from typing import Any, Dict
+
+from . import instrument
+from .frozen import FrozenDict
+
+
+def _is_array_of_tables(value: Any) -> bool:
+    if not isinstance(value, (list, tuple)) or not value:
+        return False
+
+    return all(isinstance(item, dict) for item in value)
+
+
+def _is_simple_inline_table(d: dict) -> bool:
+    if not d:
+        return True
+    for value in d.values():
+        if isinstance(value, dict):
+            return False
+        if isinstance(value, (list, tuple)):
+            if value and isinstance(value[0], dict):
+                return False
+    return True
+
+
+def _has_only_array_of_tables(table: dict) -> bool:
+    for value in table.values():
+        if not _is_array_of_tables(value):
+            return False
+    return True
+
+
+class TomlSerializer:
+    @staticmethod
+    def serialize(data: Dict[str, Any]) -> str:
+        return TomlSerializer._serialize(data)
+
+    @staticmethod
+    def _serialize(data: Dict[str, Any]) -> str:
+        with instrument.stage("serialize.toml") as stage:
+            result = "\n".join(TomlSerializer._lines(data))
+            if stage:
+                stage.defer("nodes", instrument.count_nodes, data)
+                stage.defer("bytes", instrument.utf8_length, result)
+
+        return result
+
+    @staticmethod
+    def _lines(data: Dict[str, Any], sections=None, section=None) -> list:
+        escaped = {}
+
+        def escape_string(s: str) -> str:
+            cached = escaped.get(s)
+            if cached is not None:
+                return cached
+
+            result = []
+            for char in s:
+                if char == '\\':
+                    result.append('\\\\')
+                elif char == '"':
+                    result.append('\\"')
+                elif char == '\b':
+                    result.append('\\b')
+                elif char == '\t':
+                    result.append('\\t')
+                elif char == '\n':
+                    result.append('\\n')
+                elif char == '\f':
+                    result.append('\\f')
+                elif char == '\r':
+                    result.append('\\r')
+                elif ord(char) < 0x20 or ord(char) == 0x7F:
+                    result.append(f"\\u{ord(char):04x}")
+                else:
+                    result.append(char)
+            cached = escaped[s] = '"' + ''.join(result) + '"'
+            return cached
+
+        def escape_key(key: str) -> str:
+            if key == "":
+                return escape_string(key)
+
+            allowed_chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+            needs_escaping = False
+
+            if key[0].isdigit():
+                needs_escaping = True
+            else:
+                for char in key:
+                    if char not in allowed_chars:
+                        needs_escaping = True
+                        break
+
+            if needs_escaping:
+                return escape_string(key)
+            return key
+
+        def serialize_value(value: Any, allow_inline_table: bool = True) -> str:
+            if isinstance(value, str):
+                return escape_string(value)
+            if isinstance(value, bool):
+                return "true" if value else "false"
+            if isinstance(value, int):
+                return str(value)
+            if isinstance(value, float):
+                if value == float('inf'):
+                    return "inf"
+                elif value == float('-inf'):
+                    return "-inf"
+                elif value != value:
+                    return "nan"
+                return str(value)
+            if isinstance(value, (list, tuple)):
+                if not value:
+                    return "[]"
+
+                if _is_array_of_tables(value):
+                    raise ValueError("Array of tables cannot be inline")
+
+                items = [serialize_value(item, allow_inline_table=False) for item in value]
+                return "[" + ", ".join(items) + "]"
+            if isinstance(value, dict):
+                if allow_inline_table and _is_simple_inline_table(value):
+                    if not value:
+                        return "{}"
+                    pairs = []
+                    for k, v in value.items():
+                        pairs.append(f"{escape_key(k)} = {serialize_value(v, allow_inline_table=False)}")
+                    return "{ " + ", ".join(pairs) + " }"
+                else:
+                    raise ValueError("Non-inline table in value position")
+            raise TypeError(f"Unsupported type: {type(value)}")
+
+        def write_section(header: str, kind: str, table: dict, path: list, location: tuple, output: list,
+                          write_contents):
+            if sections is None:
+                output.append(header)
+                write_contents(table, path, location, output)
+                return
+
+            entry = [location, kind, table, len(output), None]
+            sections.append(entry)
+            output.append(header)
+            write_contents(table, path, location, output)
+            entry[4] = len(output)
+
+        def write_array_of_tables(array: list, path: list, location: tuple, output: list,
+                                  add_blank_before_first: bool = True):
+            for i, item in enumerate(array):
+                if i > 0:
+                    output.append("")
+                elif add_blank_before_first and output and output[-1] != "":
+                    output.append("")
+
+                header = ".".join(escape_key(part) for part in path)
+                write_section(f"[[{header}]]", "array", item, path, location + (i,), output, write_item_contents)
+
+        def write_item_contents(table: dict, path: list, location: tuple, output: list):
+            simple_values = []
+            nested_tables = []
+            array_of_tables_list = []
+
+            for key, value in sorted(table.items()):
+                if _is_array_of_tables(value):
+                    array_of_tables_list.append((key, value))
+                elif isinstance(value, dict) and not _is_simple_inline_table(value):
+                    nested_tables.append((key, value))
+                else:
+                    simple_values.append((key, value))
+
+            for key, value in simple_values:
+                try:
+                    output.append(f"{escape_key(key)} = {serialize_value(value)}")
+                except ValueError:
+                    nested_tables.append((key, value))
+
+            for key, value in nested_tables:
+                if not isinstance(value, dict):
+                    continue
+
+                if _has_only_array_of_tables(value):
+                    for nested_key, nested_array in sorted(value.items()):
+                        if _is_array_of_tables(nested_array):
+                            write_array_of_tables(nested_array, path + [key, nested_key], location + (key, nested_key),
+                                                  output, add_blank_before_first=True)
+                else:
+                    if output and output[-1] != "":
+                        output.append("")
+                    nested_path = path + [key]
+                    header = ".".join(escape_key(part) for part in nested_path)
+                    write_section(f"[{header}]", "table", value, nested_path, location + (key,), output,
+                                  write_table_contents)
+
+            for key, array in array_of_tables_list:
+                add_blank = len(simple_values) > 0 or len(nested_tables) > 0
+                write_array_of_tables(array, path + [key], location + (key,), output, add_blank_before_first=add_blank)
+
+        def write_table_contents(table: dict, path: list, location: tuple, res: list):
+            simple_values = []
+            nested_tables = []
+            array_of_tables_list = []
+
+            for key, value in sorted(table.items()):
+                if _is_array_of_tables(value):
+                    array_of_tables_list.append((key, value))
+                elif isinstance(value, dict) and not _is_simple_inline_table(value):
+                    nested_tables.append((key, value))
+                else:
+                    simple_values.append((key, value))
+
+            for key, value in simple_values:
+                try:
+                    res.append(f"{escape_key(key)} = {serialize_value(value)}")
+                except ValueError:
+                    nested_tables.append((key, value))
+
+            for key, value in nested_tables:
+                if not isinstance(value, dict):
+                    continue
+
+                if _has_only_array_of_tables(value):
+                    nested_path = path + [key]
+                    write_table_contents(value, nested_path, location + (key,), res)
+                else:
+                    if res and res[-1] != "":
+                        res.append("")
+                    nested_path = path + [key]
+                    header = ".".join(escape_key(part) for part in nested_path)
+                    write_section(f"[{header}]", "table", value, nested_path, location + (key,), res,
+                                  write_table_contents)
+
+            for key, array in array_of_tables_list:
+                add_blank = len(simple_values) > 0 or len(nested_tables) > 0
+                write_array_of_tables(array, path + [key], location + (key,), res, add_blank_before_first=add_blank)
+
+        def serialize_section(table: dict, output: list):
+            simple_values = []
+            nested_tables = []
+            array_of_tables_list = []
+
+            for key, value in sorted(table.items()):
+                if _is_array_of_tables(value):
+                    array_of_tables_list.append((key, value))
+                elif isinstance(value, dict) and not _is_simple_inline_table(value):
+                    nested_tables.append((key, value))
+                else:
+                    simple_values.append((key, value))
+
+            for key, value in simple_values:
+                try:
+                    output.append(f"{escape_key(key)} = {serialize_value(value)}")
+                except ValueError:
+                    nested_tables.append((key, value))
+
+            for key, value in nested_tables:
+                if output and output[-1] != "":
+                    output.append("")
+                header = ".".join(escape_key(part) for part in [key])
+                write_section(f"[{header}]", "table", value, [key], (key,), output, write_table_contents)
+
+            for key, array in array_of_tables_list:
+                write_array_of_tables(array, [key], (key,), output)
+
+        output = []
+        if section is None:
+            serialize_section(data, output)
+        else:
+            kind, location = section
+            path = [part for part in location if isinstance(part, str)]
+            header = ".".join(escape_key(part) for part in path)
+            if kind == "array":
+                write_section(f"[[{header}]]", kind, data, path, location, output, write_item_contents)
+            else:
+                write_section(f"[{header}]", kind, data, path, location, output, write_table_contents)
+
+        while output and output[-1] == "":
+            output.pop()
+        return output
+
+
+def _common_prefix(a: bytes, b: bytes, block: int = 1 << 16) -> int:
+    a = memoryview(a)
+    b = memoryview(b)
+    limit = min(len(a), len(b))
+
+    lo = 0
+    while lo < limit:
+        hi = min(lo + block, limit)
+        if a[lo:hi] != b[lo:hi]:
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if a[lo:mid] == b[lo:mid]:
+                    lo = mid
+                else:
+                    hi = mid
+            return lo
+        lo = hi
+    return limit
+
+
+class _Section:
+    __slots__ = ("kind", "fallback", "start", "end", "shifts", "own", "digest", "value", "children")
+
+    def __init__(self, kind, start, end, shifts, value, fallback=False):
+        self.kind = kind
+        self.fallback = fallback
+        self.start = start
+        self.end = end
+        self.shifts = shifts
+        self.own = None
+        self.digest = None
+        self.value = value
+        self.children = []
+
+
+def _lookup(data: Any, location: tuple) -> Any:
+    for part in location:
+        data = data[part]
+    return data
+
+
+def _digest(value: Any) -> bytes:
+    return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=16).digest()
+
+
+def _own_digest(value: Any, location: tuple, children: list) -> bytes:
+    # Digest of everything a section renders itself: nested sections are
+    # replaced by a placeholder, since they are checked (and spliced) on
+    # their own.
+    if not children:
+        return _digest(value)
+    children = set(children)
+
+    def mask(value, location):
+        if location in children:
+            return ...
+        if isinstance(value, dict):
+            return tuple(
+                (key, mask(item, location + (key,)) if isinstance(item, (dict, list, tuple)) else item)
+                for key, item in value.items()
+            )
+        if isinstance(value, (list, tuple)):
+            return [
+                mask(item, location + (i,)) if isinstance(item, (dict, list, tuple)) else item
+                for i, item in enumerate(value)
+            ]
+        return value
+
+    return _digest(mask(value, location))
+
+
+def _renders_as(kind: str, value: Any) -> bool:
+    if not isinstance(value, dict):
+        return False
+    if kind == "table":
+        return not _is_simple_inline_table(value) and not _has_only_array_of_tables(value)
+    return True
+
+
+class IncrementalTomlSerializer:
+    def __init__(self, compact_after: int = 64):
+        self.compact_after = compact_after
+        self._output = None
+        self._sections = {}
+        self._shifts = []
+        self._previous_stat = None
+
+    def _offsets(self, section: _Section):
+        start, end = section.start, section.end
+        for position, delta in self._shifts[section.shifts:]:
+            if start >= position:
+                start += delta
+            if end >= position:
+                end += delta
+        return start, end
+
+    def _compact(self):
+        for section in self._sections.values():
+            section.start, section.end = self._offsets(section)
+            section.shifts = 0
+        self._shifts = []
+
+    def _register(self, entries: list, lines: list, base: int, parent: tuple = None):
+        # entries come from TomlSerializer._lines in document order as
+        # [location, kind, table, first line, end line]; line numbers are
+        # turned into byte offsets relative to base.
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line.encode("utf-8")) + 1)
+
+        stack = [] if parent is None else [(self._sections[parent], None)]
+        for location, kind, table, first, last in entries:
+            # A table that looked inline but failed to render inline is
+            # written after its sorted siblings, so its position depends on
+            # its content.
+            section = _Section(
+                kind, base + offsets[first], base + offsets[last] - 1, len(self._shifts),
+                table if isinstance(table, FrozenDict) else None,
+                kind == "table" and _is_simple_inline_table(table),
+            )
+            while stack and stack[-1][1] is not None and stack[-1][1] <= first:
+                stack.pop()
+            if stack:
+                stack[-1][0].children.append(location)
+            self._sections[location] = section
+            stack.append((section, last))
+
+        for location, _, table, _, _ in entries:
+            section = self._sections[location]
+            section.own = _own_digest(table, location, section.children)
+            if not section.children:
+                section.digest = section.own
+
+    def _render(self, data: Dict[str, Any]):
+        entries = []
+        lines = TomlSerializer._lines(data, entries)
+        output = "\n".join(lines).encode("utf-8")
+
+        root = _Section(None, 0, len(output), 0, data if isinstance(data, FrozenDict) else None)
+        self._sections = {(): root}
+        self._shifts = []
+        self._register(entries, lines, 0, ())
+        root.own = _own_digest(data, (), root.children)
+        return output
+
+    def _drop(self, location: tuple):
+        stack = [location]
+        while stack:
+            stack.extend(self._sections.pop(stack.pop()).children)
+
+    def _splice(self, data: Dict[str, Any], location: tuple) -> int:
+        section = self._sections[location]
+        value = _lookup(data, location)
+        entries = []
+        lines = TomlSerializer._lines(value, entries, (section.kind, location))
+        rendered = "\n".join(lines).encode("utf-8")
+
+        start, end = self._offsets(section)
+        for child in section.children:
+            self._drop(child)
+        del self._sections[location]
+
+        self._output[start:end] = rendered
+        if len(rendered) != end - start:
+            self._shifts.append((end, len(rendered) - (end - start)))
+        self._register(entries, lines, start)
+        return start
+
+    def _changed_sections(self, data: Dict[str, Any], changed) -> list:
+        sections = self._sections
+        found = []
+
+        if changed is not None:
+            for path in changed:
+                path = tuple(path)
+                found.append(next(path[:i] for i in range(len(path), -1, -1) if path[:i] in sections))
+            return found
+
+        # repr() runs in C, so comparing whole-subtree digests top-down is
+        # cheap; own digests are only recomputed under subtrees that changed.
+        # Digests of nested sections are filled in the first time they are
+        # visited. The root is never hashed whole: that would cost as much as
+        # hashing all top-level sections again.
+        def walk(location, value):
+            section = sections[location]
+            if value is section.value and value is not None:
+                return
+            if location:
+                digest = _digest(value)
+                if digest == section.digest:
+                    return
+                section.digest = digest
+            if not section.children or _own_digest(value, location, section.children) != section.own:
+                found.append(location)
+                return
+            for child in section.children:
+                walk(child, _lookup(value, child[len(location):]))
+
+        walk((), data)
+        return found
+
+    def _enclosing(self, data: Dict[str, Any], location: tuple):
+        # A change can turn a section into an inline value, remove it, or move
+        # it among its siblings; then the section that contains it has to be
+        # rendered instead.
+        while location:
+            section = self._sections.get(location)
+            if section is not None and not section.fallback:
+                try:
+                    if _renders_as(section.kind, _lookup(data, location)):
+                        return location
+                except (KeyError, IndexError, TypeError):
+                    pass
+            location = location[:-1]
+        return None
+
+    def _update(self, data: Dict[str, Any], changed=None):
+        if self._output is None:
+            self._output = bytearray(self._render(data))
+            return [(0, len(self._output))], True
+
+        if len(self._shifts) >= self.compact_after:
+            self._compact()
+
+        targets = []
+        for location in self._changed_sections(data, changed):
+            location = self._enclosing(data, location)
+            if location is None:
+                targets = None
+                break
+            targets.append(location)
+
+        if targets is None:
+            previous = self._output
+            self._output = bytearray(self._render(data))
+            return [(_common_prefix(previous, self._output), len(self._output))], True
+
+        kept = set()
+        for location in sorted(set(targets), key=len):
+            if not any(location[:i] in kept for i in range(len(location))):
+                kept.add(location)
+
+        if changed is not None:
+            for location in kept:
+                for i in range(len(location)):
+                    section = self._sections.get(location[:i])
+                    if section is not None:
+                        section.digest = None
+
+        shifts = len(self._shifts)
+        regions = sorted((self._splice(data, location), location) for location in kept)
+        regions = [(start, self._sections[location].end) for start, location in regions]
+
+        # A splice only moves the spans that follow it, so the first changed
+        # offset stays valid; once a length changed, the rest has to move too.
+        if len(self._shifts) != shifts:
+            return [(regions[0][0], len(self._output))], True
+        return regions, False
+
+    def serialize(self, data: Dict[str, Any], changed=None) -> str:
+        with instrument.stage("serialize.toml.incremental") as stage:
+            regions, _ = self._update(data, changed)
+            if stage:
+                stage.bytes = sum(end - start for start, end in regions)
+        return self._output.decode("utf-8")
+
+    def write(self, data: Dict[str, Any], path: str, changed=None) -> int:
+        with instrument.stage("serialize.toml.incremental") as stage:
+            regions, resized = self._update(data, changed)
+
+            stat = os.stat(path) if os.path.exists(path) else None
+            if stat is None or (path, stat.st_size, stat.st_mtime_ns) != self._previous_stat:
+                regions, resized = [(0, len(self._output))], True
+
+            with memoryview(self._output) as output:
+                if resized and regions[0][0] == 0:
+                    with open(path, "wb") as f:
+                        f.write(output)
+                elif regions:
+                    with open(path, "r+b") as f:
+                        for start, end in regions:
+                            f.seek(start)
+                            f.write(output[start:end])
+                        if resized:
+                            f.truncate(len(output))
+
+            written = sum(end - start for start, end in regions)
+            if stage:
+                stage.bytes = written
+
+        stat = os.stat(path)
+        self._previous_stat = (path, stat.st_size, stat.st_mtime_ns)
+        return written
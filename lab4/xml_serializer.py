@@ -1,9 +1,10 @@
 from datetime import datetime
 from typing import Any, Dict, List
 from enum import Enum
-from dataclasses import is_dataclass
 from decimal import Decimal
 
+from . import instrument
+
 
 class XMLSerializer:
 
@@ -13,9 +14,14 @@ class XMLSerializer:
         self._current_indent = 0
 
     def serialize(self, obj: Any, root_tag: str = "root") -> str:
-        self._current_indent = 0
-        xml_content = self._to_xml(obj, root_tag)
-        return f'<?xml version="1.0" encoding="{self.encoding}"?>\n{xml_content}'
+        with instrument.stage("serialize.xml") as stage:
+            self._current_indent = 0
+            xml_content = self._to_xml(obj, root_tag)
+            result = f'<?xml version="1.0" encoding="{self.encoding}"?>\n{xml_content}'
+            if stage:
+                stage.defer("nodes", instrument.count_nodes, obj)
+                stage.defer("bytes", instrument.utf8_length, result)
+        return result
 
     def _to_xml(self, obj: Any, tag: str) -> str:
 
@@ -37,7 +43,7 @@ class XMLSerializer:
         if isinstance(obj, (list, tuple, set)):
             return self._list_to_xml(obj, tag)
 
-        if is_dataclass(obj):
+        if hasattr(obj, '__dataclass_fields__'):
             return self._dataclass_to_xml(obj, tag)
 
         if hasattr(obj, '__dict__'):
@@ -0,0 +1,106 @@
+import os
+
+from lab4.archive import BinArchive
+
+
+def make_archive(path, count):
+    with BinArchive(path, "a") as archive:
+        for i in range(count):
+            archive.append(f"config-{i}", {"id": i, "name": f"config {i}"})
+
+
+def test_reader_during_append(tmp_path):
+    path = str(tmp_path / "configs.bar")
+    make_archive(path, 20_000)
+
+    with BinArchive(path) as reader:
+        writer = BinArchive(path, "a")
+        writer.append("config-0", {"id": 0, "name": "updated"})
+        writer.append("extra", {"id": -1})
+
+        assert reader.get("config-0") == {"id": 0, "name": "config 0"}
+        assert reader.get("config-19999") == {"id": 19999, "name": "config 19999"}
+
+        with BinArchive(path) as concurrent:
+            assert len(concurrent) == 20_000
+            assert concurrent.get("config-0") == {"id": 0, "name": "config 0"}
+            assert "extra" not in concurrent
+
+        writer.close()
+        assert reader.get("config-123") == {"id": 123, "name": "config 123"}
+
+    with BinArchive(path) as reader:
+        assert len(reader) == 20_001
+        assert reader.get("config-0") == {"id": 0, "name": "updated"}
+        assert reader.get("extra") == {"id": -1}
+
+
+def test_torn_tail(tmp_path):
+    path = str(tmp_path / "configs.bar")
+    make_archive(path, 100)
+
+    writer = BinArchive(path, "a")
+    writer.append("recovered", {"id": 100})
+    writer._file.flush()
+    with open(path, "ab") as f:
+        f.write(b"HREC\x00\x05\x00\x00\x10")
+    writer._file.close()
+    writer._file = None
+
+    with BinArchive(path) as reader:
+        assert len(reader) == 100
+        assert "recovered" not in reader
+        assert reader.get("config-99") == {"id": 99, "name": "config 99"}
+
+    with BinArchive(path, "a") as archive:
+        assert archive.get("recovered") == {"id": 100}
+        archive.append("config-1", {"id": 1})
+
+    with BinArchive(path) as reader:
+        assert len(reader) == 101
+        assert reader.get("recovered") == {"id": 100}
+        assert reader.get("config-1") == {"id": 1}
+        assert sorted(reader.names()) == sorted([f"config-{i}" for i in range(100)] + ["recovered"])
+
+    size = os.path.getsize(path)
+    BinArchive.rebuild_index(path)
+    assert os.path.getsize(path) < size
+    with BinArchive(path) as reader:
+        assert len(reader) == 101
+        assert reader.get("config-1") == {"id": 1}
+
+
+def test_size_after_repeated_appends(tmp_path):
+    path = str(tmp_path / "configs.bar")
+    make_archive(path, 10_000)
+    initial = os.path.getsize(path)
+
+    for session in range(20):
+        with BinArchive(path, "a") as archive:
+            archive.append(f"config-{session}", {"id": session, "name": "replaced"})
+        assert os.path.getsize(path) <= 2 * initial + 1024
+
+    with BinArchive(path) as reader:
+        assert len(reader) == 10_000
+        assert reader.get("config-19") == {"id": 19, "name": "replaced"}
+        assert reader.get("config-20") == {"id": 20, "name": "config 20"}
+
+
+def test_compact_keeps_open_readers(tmp_path):
+    path = str(tmp_path / "configs.bar")
+    make_archive(path, 1_000)
+
+    with BinArchive(path) as reader:
+        with BinArchive(path, "a") as archive:
+            for i in range(500):
+                archive.append(f"config-{i}", {"id": i, "name": "replaced"})
+            archive.compact()
+            assert archive.get("config-1") == {"id": 1, "name": "replaced"}
+            archive.append("extra", {"id": -1})
+
+        assert reader.get("config-1") == {"id": 1, "name": "config 1"}
+
+    with BinArchive(path) as reader:
+        assert len(reader) == 1_001
+        assert reader.get("config-1") == {"id": 1, "name": "replaced"}
+        assert reader.get("extra") == {"id": -1}
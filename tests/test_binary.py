@@ -0,0 +1,36 @@
+import pytest
+
+from lab4.binary import BinSerializer
+from lab4.corpus import make_schedule
+from lab4.frozen import freeze
+from lab4.hcl import HclParser
+from lab4.parallel import deserialize_parallel
+
+
+DOCS = [
+    {},
+    [],
+    {"a": [], "b": {}, "c": [1, -2.5, True, "ж"], "d": {"e": [{"f": "g"}, [[]]]}},
+    [{"id": i, "name": f"config {i}"} for i in range(50)],
+    HclParser(make_schedule(20)).parse(),
+]
+
+
+@pytest.mark.parametrize("doc", DOCS)
+@pytest.mark.parametrize("index_threshold", [None, 1, 3])
+def test_round_trip(doc, index_threshold):
+    data = BinSerializer.serialize(doc, index_threshold=index_threshold)
+    assert BinSerializer.deserialize(data) == doc
+    assert BinSerializer.serialize(freeze(doc), index_threshold=index_threshold) == data
+
+
+def test_index_changes_layout():
+    doc = DOCS[-1]
+    assert BinSerializer.serialize(doc, index_threshold=1) != BinSerializer.serialize(doc)
+
+
+@pytest.mark.parametrize("doc", DOCS)
+def test_deserialize_parallel(doc):
+    data = BinSerializer.serialize(doc, index_threshold=1)
+    assert deserialize_parallel(data, workers=2, threshold=1) == doc
+    assert deserialize_parallel(BinSerializer.serialize(doc), workers=2, threshold=1) == doc
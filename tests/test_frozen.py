@@ -0,0 +1,24 @@
+import math
+
+from lab4.frozen import freeze
+from lab4.hcl import HclParser
+from lab4.pipeline import publish
+from lab4.toml_serializer import TomlSerializer
+
+
+def test_signed_zero_is_not_merged():
+    tree = freeze({"a": 0.0, "b": -0.0, "c": [0.0, -0.0], "d": 0, "e": False})
+    assert math.copysign(1, tree["b"]) == -1
+    assert [math.copysign(1, value) for value in tree["c"]] == [1, -1]
+    assert tree["d"] is not tree["e"]
+
+
+def test_frozen_parse_matches_plain(tmp_path):
+    text = 'a = 0.0\nb = -0.0\nblock "x" {\n  c = -0.0\n  d = 0.0\n}\n'
+    expected = TomlSerializer.serialize(HclParser(text).parse())
+    assert TomlSerializer.serialize(HclParser(text, frozen=True).parse()) == expected
+
+    path = str(tmp_path / "out.toml")
+    publish(text, [(path, None)])
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == expected
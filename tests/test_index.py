@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from lab4.corpus import make_schedule
+from lab4.hcl import HclParser
+from lab4.index import tokenize_bytes
+
+
+PIECES = ('"', "{", "}", "=", "\n", " ", "\t", "a", "b", "ж", "x y", '"str"', '"long string with = { }"', "-1.5", "42")
+BLOCK_SIZES = (1, 2, 3, 7, 1 << 24)
+
+
+def samples():
+    rng = random.Random(0)
+    for _ in range(300):
+        yield "".join(rng.choice(PIECES) for _ in range(rng.randrange(30)))
+    yield ""
+    yield make_schedule(3)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_matches_str_tokenizer(block_size, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    for text in samples():
+        expected = HclParser._tokenize(text)
+        assert tokenize_bytes(text.encode(), use_numpy=use_numpy, block_size=block_size) == expected, text
+
+
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_interned_strings_are_shared(block_size):
+    strings = {}
+    tokens = tokenize_bytes(make_schedule(4).encode(), strings, use_numpy=False, block_size=block_size)
+    assert tokens == HclParser._tokenize(make_schedule(4))
+    rooms = [value for _, value in tokens if value == "1328"]
+    assert len(rooms) == 8
+    assert all(room is rooms[0] for room in rooms)
@@ -0,0 +1,50 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from lab4.corpus import make_schedule
+from lab4.hcl import HclParser
+from lab4.parallel import parse_parallel, split_top_level
+
+
+KEYS = ("a", "b", "c")
+
+
+def random_statement(rng, depth=0):
+    key = rng.choice(KEYS)
+    r = rng.random()
+    if depth > 2 or r < 0.4:
+        return f'{key} = "{rng.randrange(100)}"\n'
+    body = "".join(random_statement(rng, depth + 1) for _ in range(rng.randrange(3)))
+    label = f' "{rng.choice(KEYS)}"' if r < 0.7 else ""
+    return f"{key}{label} {{\n{body}}}\n"
+
+
+def test_split_top_level():
+    text = make_schedule(40)
+    chunks = split_top_level(text, 8)
+    assert "".join(chunks) == text
+    assert len(chunks) > 1
+    assert all(chunk.lstrip().startswith('schedule "day') for chunk in chunks)
+    assert split_top_level(text, 8, min_chunk_size=len(text)) == [text]
+
+
+def test_repeated_keys_across_chunks():
+    text = 'a = "1"\nb { x = 1 }\n' * 3 + 'b = "2"\nb { x = 2 }\na { y = 1 }\n' + 'a = "3"\n'
+    with ThreadPoolExecutor(2) as executor:
+        assert parse_parallel(text, workers=2, min_chunk_size=0, executor=executor) == HclParser(text).parse()
+
+
+def test_random_documents():
+    rng = random.Random(0)
+    with ThreadPoolExecutor(2) as executor:
+        for _ in range(300):
+            text = "".join(random_statement(rng) for _ in range(rng.randrange(1, 12)))
+            result = parse_parallel(text, workers=2, min_chunk_size=0, chunks_per_worker=rng.randrange(1, 5), executor=executor)
+            assert result == HclParser(text).parse(), text
+
+
+def test_process_pool():
+    text = make_schedule(30) + 'schedule = "none"\n' + make_schedule(5)
+    expected = HclParser(text).parse()
+    assert parse_parallel(text, workers=2, min_chunk_size=0) == expected
+    assert parse_parallel(text, workers=2, min_chunk_size=0, frozen=True) == HclParser(text, frozen=True).parse()
@@ -0,0 +1,111 @@
+import copy
+import random
+
+import pytest
+
+from lab4.corpus import make_schedule
+from lab4.frozen import freeze
+from lab4.hcl import HclParser
+from lab4.toml_serializer import IncrementalTomlSerializer, TomlSerializer
+
+
+KEYS = ("a", "c", "k y", "Ж")
+SCALARS = (1, 9, 2.5, True, "ЖЖЖ", 'a"b', [], [1, 2])
+
+
+def random_value(rng, depth=0):
+    r = rng.random()
+    if depth > 3 or r < 0.45:
+        return copy.deepcopy(rng.choice(SCALARS))
+    if r < 0.75:
+        return {rng.choice(KEYS): random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+    return [random_value(rng, depth + 1) if rng.random() < 0.2 else random_table(rng, depth + 1)
+            for _ in range(rng.randrange(1, 3))]
+
+
+def random_table(rng, depth):
+    return {rng.choice(KEYS): random_value(rng, depth + 1) for _ in range(rng.randrange(3))}
+
+
+def containers(value, path=()):
+    yield path, value
+    items = value.items() if isinstance(value, dict) else enumerate(value)
+    for key, item in items:
+        if isinstance(item, (dict, list)):
+            yield from containers(item, path + (key,))
+
+
+def mutate(rng, tree):
+    path, container = rng.choice(list(containers(tree)))
+    if isinstance(container, dict):
+        if container and rng.random() < 0.3:
+            del container[rng.choice(list(container))]
+        else:
+            container[rng.choice(KEYS + ("n1", "n2"))] = random_value(rng, len(path))
+    elif not container or rng.random() < 0.2:
+        container.append(random_table(rng, len(path)))
+    else:
+        container[rng.randrange(len(container))] = random_value(rng, len(path))
+    return path
+
+
+def renders(tree):
+    try:
+        return TomlSerializer.serialize(tree)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+@pytest.mark.parametrize("mode", ["digest", "changed", "frozen"])
+def test_incremental_matches_full(mode):
+    rng = random.Random(mode)
+    for _ in range(150):
+        tree = {key: random_value(rng) for key in KEYS}
+        if rng.random() < 0.3:
+            tree["schedule"] = HclParser(make_schedule(2)).parse()["schedule"]
+        if renders(tree) is None:
+            continue
+
+        serializer = IncrementalTomlSerializer(compact_after=rng.choice((1, 4, 64)))
+        serializer.serialize(tree)
+        for _ in range(12):
+            previous = copy.deepcopy(tree)
+            changed = [mutate(rng, tree) for _ in range(rng.randrange(1, 3))]
+            expected = renders(tree)
+            if expected is None:
+                tree = previous
+                serializer.serialize(tree)
+                continue
+
+            if mode == "changed":
+                assert serializer.serialize(tree, changed=changed) == expected
+            else:
+                assert serializer.serialize(freeze(tree) if mode == "frozen" else tree) == expected
+
+
+def test_section_moves_back_into_sorted_order():
+    tree = {"a": {"a": [{"b": []}, {}], "k y": [], "c": [], "Ж": 1}, "c": "ЖЖЖ", "k y": {"Ж": {"Ж": True, "c": []}}}
+    serializer = IncrementalTomlSerializer()
+    serializer.serialize(tree)
+
+    tree["a"]["n1"] = 3
+    assert serializer.serialize(tree, changed=[("a", "n1")]) == TomlSerializer.serialize(tree)
+    tree["a"]["a"][0] = 9
+    assert serializer.serialize(tree) == TomlSerializer.serialize(tree)
+    tree["a"]["n2"] = {"k y": {}, "Ж": 2.5}
+    assert serializer.serialize(tree) == TomlSerializer.serialize(tree)
+
+
+def test_write_patches_file(tmp_path):
+    path = str(tmp_path / "schedule.toml")
+    tree = HclParser(make_schedule(50)).parse()
+    serializer = IncrementalTomlSerializer()
+    serializer.write(tree, path)
+
+    tree["schedule"][10]["day10"][0]["lecture"][1]["room"] = "1329"
+    assert serializer.write(tree, path) < 1024
+    tree["schedule"][20]["day20"][0]["lecture"][0]["room"] = "1328 (ауд.)"
+    serializer.write(tree, path, changed=[("schedule", 20, "day20", 0, "lecture", 0, "room")])
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == TomlSerializer.serialize(tree)